@@ -0,0 +1,286 @@
+# Benchmark suite for the hot paths of this library: mixing mud, applying
+# it to single frogs and whole populations, adjusting traits, parsing
+# mushroom effects, importing the collections, classifying genomes and
+# searching for breeding plans. All random inputs come from fixed seeds and
+# population sizes go up to the full 7**7 genome space, so results from two
+# runs on the same machine can be compared directly.
+
+# Usage:
+#
+#   python benchmarks.py --output results.json
+#   python benchmarks.py --output new.json --compare results.json
+#
+# Results are written as JSON with the minimum, median and mean time per
+# call of every benchmark. With --compare, each benchmark's minimum time is
+# compared against a previous run, and the exit status is 1 if any of them
+# got slower by more than the threshold.
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from frog import Frog, GeneticTrait, PackedGeneticCode, n_genomes
+from fungi import Mud
+
+default_seed = 20240501
+
+def measure(func, repeat=5, number=1):
+    """Calls func number times per round for repeat rounds and returns the
+    per-call time of each round, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return times
+
+def summarize(times, items=1):
+    return {
+        "repeat": len(times),
+        "items": items,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "min_per_item": min(times) / items,
+    }
+
+def random_recipes(mushrooms, count, rng, max_mushrooms=3):
+    return [tuple(rng.choices(mushrooms, k=rng.randint(1, max_mushrooms))) for _ in range(count)]
+
+def bench_mix_mud(mushrooms, rng, quick):
+    recipes = random_recipes(mushrooms, 200 if quick else 2000, rng)
+    def run():
+        for recipe in recipes:
+            Mud(recipe)
+    return summarize(measure(run), len(recipes))
+
+def bench_apply_to_frog(mushrooms, rng, quick):
+    muds = [Mud(recipe) for recipe in random_recipes(mushrooms, 100, rng)]
+    frogs = [Frog("".join(str(rng.randint(1, 7)) for _ in range(7)), flavors="Salty")
+             for _ in range(100 if quick else 1000)]
+    def run():
+        for i, frog in enumerate(frogs):
+            muds[i % len(muds)].apply_to_frog(frog)
+    return summarize(measure(run), len(frogs))
+
+def bench_apply_to_packed_frog(mushrooms, rng, quick):
+    muds = [Mud(recipe) for recipe in random_recipes(mushrooms, 100, rng)]
+    frogs = [Frog(PackedGeneticCode(rng.randrange(n_genomes)), flavors="Salty")
+             for _ in range(100 if quick else 1000)]
+    def run():
+        for i, frog in enumerate(frogs):
+            muds[i % len(muds)].apply_to_frog(frog)
+    return summarize(measure(run), len(frogs))
+
+def bench_apply_to_genomes(mushrooms, rng, size):
+    mud = Mud(random_recipes(mushrooms, 1, rng)[0])
+    genomes = np.random.default_rng(rng.randrange(2 ** 32)).integers(1, 8, (size, 7), dtype=np.uint8)
+    out = np.empty_like(genomes)
+    return summarize(measure(lambda: mud.apply_to_genomes(genomes, out)), size)
+
+def bench_adjust(rng, quick):
+    operations = ("add", "mult", "min", "max", "suppress")
+    steps = [(rng.choice(operations), rng.choice((-2, -1, 1, 2))) for _ in range(1000 if quick else 10000)]
+    trait = GeneticTrait("Ribbit", 4)
+    def run():
+        for operation, scalar in steps:
+            trait.adjust(operation, scalar)
+    return summarize(measure(run), len(steps))
+
+def bench_parse_effects(mushrooms, quick):
+    effects = []
+    for mushroom in mushrooms:
+        parts = []
+        for code, mods in mushroom.modifier.modifiers.items():
+            for mod in mods:
+                match mod.operation:
+                    case "add":
+                        parts.append(f"{mod.scalar:+d} {code}")
+                    case "mult":
+                        parts.append(f"x{mod.scalar} {code}")
+                    case "min":
+                        parts.append(f"min {code}")
+                    case "max":
+                        parts.append(f"Max {code}")
+                    case "suppress":
+                        parts.append(f"suppress {code}")
+        effects.append(", ".join(parts))
+    mushroom = mushrooms[0]
+    rounds = 10 if quick else 100
+    def run():
+        for _ in range(rounds):
+            for effect in effects:
+                mushroom.parse_effects(effect)
+    return summarize(measure(run), rounds * len(effects))
+
+def bench_import(quick):
+    # Each import runs in a fresh interpreter, timed from inside so that
+    # interpreter startup is not included.
+    code = ("import time; start = time.perf_counter(); "
+            "import frog_collection, fungi_collection, critters_collection, flora_collection; "
+            "print(time.perf_counter() - start)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(3 if quick else 5):
+        result = subprocess.run([sys.executable, "-c", code], cwd=here, check=True,
+                                capture_output=True, text=True)
+        times.append(float(result.stdout))
+    return summarize(times)
+
+def bench_build_collections():
+    import critters_collection, flora_collection, frog_collection, fungi_collection
+    from catalog import Catalog
+    def run():
+        for collection in (frog_collection, fungi_collection, critters_collection, flora_collection):
+            catalog = Catalog()
+            catalog.declarations = collection.catalog.declarations
+            catalog.build_all()
+    return summarize(measure(run))
+
+def bench_classification(size, rng):
+    from frog_index import get_frog_index
+    index = get_frog_index()
+    genomes = np.random.default_rng(rng.randrange(2 ** 32)).integers(1, 8, (size, 7), dtype=np.uint8)
+    return summarize(measure(lambda: index.classify_genomes(genomes)), size)
+
+def bench_mud_and_classify(mushrooms, rng):
+    from frog_index import get_frog_index
+    from genomes import all_genomes
+    index = get_frog_index()
+    genomes = all_genomes()
+    mud = Mud(random_recipes(mushrooms, 1, rng)[0])
+    out = np.empty_like(genomes)
+    def run():
+        index.classify_genomes(mud.apply_to_genomes(genomes, out))
+    return summarize(measure(run), n_genomes)
+
+def bench_breeding_search(queries, prepare=0):
+    from breeding import BreedingPlanner
+    planner = BreedingPlanner()
+    # Warm-up: the backward side of each target is expanded beforehand, if
+    # asked, as a long-running planner would keep it.
+    for target in sorted(set(target for _, target in queries)) if prepare else []:
+        planner.prepare_goal(target, prepare)
+    def run():
+        # Every round searches anew, from the prepared backward sides only.
+        planner.plan_cache.clear()
+        if not prepare:
+            planner.goal_cache.clear()
+        for start, target in queries:
+            planner.plan(start, target)
+    return summarize(measure(run, repeat=3), len(queries))
+
+def bench_effect_table():
+    from fungi import mud_cache
+    from mud_effects import MudEffectTable
+    def run():
+        # Start from an empty cache, so that every recipe is mixed again.
+        mud_cache.clear()
+        MudEffectTable()
+    return summarize(measure(run, repeat=3))
+
+breeding_queries = [
+    ("Common Green", "Dozy Dreamer"),
+    ("Common Green", "Towering Prince"),
+    ("Low-Grade Croaker", "Waning Bullfrog"),
+    ("4444444", "7?7????"),
+]
+
+# Five generations apart, for the cost of deep searches.
+deep_breeding_queries = [
+    ("Stubby Scamp", "Towering Prince"),
+]
+
+def run_benchmarks(seed=default_seed, quick=False, only=None):
+    import fungi_collection
+    mushrooms = list(fungi_collection.catalog.values())
+    population = 10000 if quick else 1000000
+    benchmarks = {
+        "mix_mud": lambda rng: bench_mix_mud(mushrooms, rng, quick),
+        "apply_to_frog": lambda rng: bench_apply_to_frog(mushrooms, rng, quick),
+        "apply_to_packed_frog": lambda rng: bench_apply_to_packed_frog(mushrooms, rng, quick),
+        "apply_to_genomes_1k": lambda rng: bench_apply_to_genomes(mushrooms, rng, 1000),
+        f"apply_to_genomes_{population}": lambda rng: bench_apply_to_genomes(mushrooms, rng, population),
+        "apply_to_genomes_all": lambda rng: bench_apply_to_genomes(mushrooms, rng, n_genomes),
+        "genetic_trait_adjust": lambda rng: bench_adjust(rng, quick),
+        "parse_effects": lambda rng: bench_parse_effects(mushrooms, quick),
+        "import_collections": lambda rng: bench_import(quick),
+        "build_collections": lambda rng: bench_build_collections(),
+        "classify_genomes": lambda rng: bench_classification(population, rng),
+        "mud_and_classify_all": lambda rng: bench_mud_and_classify(mushrooms, rng),
+        "mud_effect_table": lambda rng: bench_effect_table(),
+        "breeding_search": lambda rng: bench_breeding_search(breeding_queries),
+        "breeding_search_deep": lambda rng: bench_breeding_search(deep_breeding_queries),
+        "breeding_search_deep_prepared": lambda rng: bench_breeding_search(deep_breeding_queries, prepare=2),
+    }
+    results = {}
+    for name, bench in benchmarks.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        # Each benchmark gets its own generator, so that selecting a subset
+        # does not change the inputs of the others.
+        results[name] = bench(random.Random(f"{seed}:{name}"))
+        print(f"{name:32s} {results[name]['min'] * 1e3:12.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "seed": seed,
+            "quick": quick,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+def compare(current, baseline, threshold=1.1):
+    """Compares the minimum times of two result sets and returns a list of
+    (name, baseline, current, ratio, regressed) rows for the benchmarks
+    present in both."""
+    rows = []
+    for name, result in current["results"].items():
+        if name in baseline["results"]:
+            before = baseline["results"][name]["min"]
+            ratio = result["min"] / before if before > 0 else float("inf")
+            rows.append((name, before, result["min"], ratio, ratio > threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--output", "-o", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", "-c", help="previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="slowdown ratio counted as a regression (default 1.1)")
+    parser.add_argument("--seed", type=int, default=default_seed)
+    parser.add_argument("--quick", action="store_true", help="use smaller inputs and fewer rounds")
+    parser.add_argument("--only", nargs="*", help="run only benchmarks whose names contain one of these")
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.seed, args.quick, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for name, before, after, ratio, regressed in compare(results, baseline, args.threshold):
+            regressions += regressed
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:32s} {before * 1e3:12.3f} -> {after * 1e3:12.3f} ms  x{ratio:.2f} {flag}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+# Planning of breeding routes between frog species. Each generation of
+# tadpoles can be exposed to one batch of magic mud, and the mixed mud acts on
+# each of the seven traits independently, so every distinct mud is a map from
+# genome to genome and the genome space (7**7 genomes, see frog.py) forms a
+# graph with one edge per distinct mud effect. The fewest generations needed
+# to get from one genome to another is then a breadth-first search over that
+# graph, carried out here on packed genetic codes with NumPy.
+
+# Muds are taken from a MudEffectTable (see mud_effects.py), so the search
+# iterates over distinct mud effects rather than every recipe, using the
+# cheapest recipe for each effect.
+
+# Deep searches are done from both ends: forward from the starting genomes,
+# and backward from every genome matching the target, through the inverse of
+# each mud. A mud maps each trait value to a new one, so the genomes a mud
+# turns into a given genome are all combinations of the per-trait preimages
+# of its values, of which there may be none or several per trait (for
+# instance every value is a preimage of 1 under a min). Whichever side has
+# the smaller frontier is expanded by one full generation at a time, until
+# the two sides meet, and the shortest route goes through the meeting genome
+# with the fewest generations on both sides combined. Both sides record their
+# generations and edges in arrays over the whole genome space, so memory use
+# is bounded no matter how far the search goes.
+
+# A cold plan to a deep target, such as Stubby Scamp to Towering Prince in
+# five generations, takes about a second, most of it spent expanding the
+# forward side. Plans are kept, so repeating one is a lookup. The backward
+# side of each target is kept too, so later plans to it from other starts
+# begin from the generations already found. It can also be expanded further
+# ahead of time with prepare_goal. Two backward generations take about
+# seven seconds to prepare, and bring a cold plan from a new start to that
+# target down to about 0.2 s.
+
+import random
+
+import numpy as np
+
+from frog import n_genomes, place_values, pack_genetics, unpack_genetics
+from frog_index import FrogIndex, get_frog_index
+from genomes import all_genomes
+from mud_effects import MudEffectTable, get_mud_effect_table
+
+# Finding a parent costs about ten times as much as finding a child, as
+# parents are built trait by trait (see BreedingPlanner.parents), so the
+# bidirectional search weighs the two sides accordingly.
+backward_weight = 10
+
+# The number of targets whose backward side is kept (about 8 MB each), the
+# least recently used being dropped first, and the number of routes kept
+# by plan.
+goal_cache_size = 8
+plan_cache_size = 1024
+
+def expand_codes(flat_contributions, nodes):
+    """Returns an (n_muds, len(nodes)) array of the packed codes produced by
+    applying every mud to every node, given the (n_muds, 49) array of
+    per-trait packed-code contributions of the muds (see BreedingPlanner)."""
+    digits = nodes[:, None] // np.array(place_values) % 7 + np.arange(0, 49, 7)
+    children = np.zeros((len(flat_contributions), len(nodes)), dtype=np.int32)
+    for t in range(7):
+        children += np.take(flat_contributions, digits[:, t], axis=1)
+    return children
+
+def group_contributions(contributions):
+    """Returns the per-mud contributions of traits A, N and O together, of U
+    and R together and of E and S together, as (343, n_muds), (49, n_muds)
+    and (49, n_muds) arrays indexed by the packed digits of those traits, so
+    that children can be found with three row lookups instead of seven
+    (see expand_grouped)."""
+    c = contributions.astype(np.int32)
+    n_muds = len(c)
+    first = (c[:, 0, :, None, None] + c[:, 1, None, :, None] + c[:, 2, None, None, :]).reshape(n_muds, 343)
+    second = (c[:, 3, :, None] + c[:, 4, None, :]).reshape(n_muds, 49)
+    third = (c[:, 5, :, None] + c[:, 6, None, :]).reshape(n_muds, 49)
+    return tuple(np.ascontiguousarray(group.T) for group in (first, second, third))
+
+def expand_grouped(groups, nodes):
+    """Returns a (len(nodes), n_muds) array of the packed codes produced by
+    applying every mud to every node, given the grouped contributions of the
+    muds (see group_contributions)."""
+    nodes = np.asarray(nodes)
+    children = groups[0][nodes // 2401]
+    children += groups[1][nodes // 49 % 49]
+    children += groups[2][nodes % 49]
+    return children
+
+planner_array_names = ("contributions", "grouped_ano", "grouped_ur", "grouped_es",
+                       "preimage_counts", "preimages")
+
+def planner_arrays(tables):
+    """Returns a dict of the per-mud arrays that a BreedingPlanner searches
+    with, computed from the (n_muds, 7, 7) compiled tables of its muds, with
+    the keys in planner_array_names."""
+    n_muds = len(tables)
+    # contributions[e, t, v - 1] is the packed-code contribution of trait t
+    # after mud e is applied to a frog with value v for that trait.
+    place = np.array(place_values, dtype=np.int32)
+    contributions = (tables.astype(np.int32) - 1) * place[None, :, None]
+    grouped = group_contributions(contributions)
+    # preimage_counts[e, t, w - 1] is the number of values of trait t that
+    # mud e turns into w, and preimages[e, t, w - 1, :count] are their
+    # packed-code contributions.
+    values = np.arange(1, 8, dtype=np.uint8)
+    preimage_counts = (tables[..., None] == values).sum(axis=2).astype(np.int32)
+    order = np.argsort(tables, axis=-1, kind="stable").astype(np.int32)
+    first = np.cumsum(preimage_counts, axis=-1) - preimage_counts
+    positions = np.minimum(first[..., None] + np.arange(7), 6).reshape(n_muds, 7, 49)
+    preimages = (np.take_along_axis(order, positions, axis=-1).reshape(n_muds, 7, 7, 7)
+                 * place[None, :, None, None])
+    return dict(zip(planner_array_names, (contributions, *grouped, preimage_counts, preimages)))
+
+class BreedingStep:
+    """One generation of a breeding plan: the mushrooms to mix into mud for
+    the tadpoles and the genetic code they grow up with."""
+    def __init__(self, recipe, genetics, frog=None):
+        self.recipe = recipe
+        self.genetics = genetics
+        self.frog = frog
+    def __repr__(self):
+        names = " + ".join(mushroom.name for mushroom in self.recipe)
+        result = self.genetics if self.frog is None else f"{self.genetics} ({self.frog.variant or self.frog.species})"
+        return f"BreedingStep({names} -> {result})"
+
+class BreedingPlanner:
+    """Finds the fewest-generation sequence of muds leading from a starting
+    genome or species to a target species, variant or trait pattern. Muds
+    come from a MudEffectTable, either given or the shared table for
+    max_mushrooms mushrooms per mud; the per-mud arrays are computed once
+    when the planner is created, and every search after that only does
+    array work. The arrays computed by planner_arrays may be given instead,
+    as when the planner is built from a snapshot."""
+    def __init__(self, effect_table=None, max_mushrooms=3, frog_index=None, arrays=None):
+        if effect_table is None:
+            effect_table = get_mud_effect_table(max_mushrooms)
+        self.effect_table = effect_table
+        self.frog_index = frog_index or get_frog_index()
+        self.effect_ids = effect_table.non_identity()
+        self.tables = effect_table.tables[self.effect_ids]
+        self.recipes = [effect_table[i].recipe for i in self.effect_ids]
+        if arrays is None:
+            arrays = planner_arrays(self.tables)
+        self.contributions = arrays["contributions"]
+        self.flat_contributions = self.contributions.reshape(len(self.recipes), 49)
+        self.grouped_contributions = tuple(arrays[name] for name in ("grouped_ano", "grouped_ur", "grouped_es"))
+        self.preimage_counts = arrays["preimage_counts"]
+        self.preimages = arrays["preimages"]
+        self.goal_cache = {}
+        self.plan_cache = {}
+    @classmethod
+    def from_snapshot(cls, snapshot, frog_index=None):
+        """Builds a planner from the mud effects, frog index and planner
+        arrays of a catalog Snapshot (see snapshot.py). Nothing is computed
+        from the mud tables: every array the searches use is a view of the
+        snapshot, so every process loading the same file shares them."""
+        frog_index = frog_index or FrogIndex.from_snapshot(snapshot)
+        arrays = {name: snapshot["breeding_" + name] for name in planner_array_names}
+        return cls(MudEffectTable.from_snapshot(snapshot), frog_index=frog_index, arrays=arrays)
+    def goal_mask(self, target):
+        """Returns a boolean array over the genome space marking genomes that
+        satisfy a target, given as a species or variant name, a seven-letter
+        trait pattern with '?' for any value (such as "7?7??7?"), or a
+        function taking an (N, 7) genome array and returning a mask."""
+        if callable(target):
+            return np.asarray(target(all_genomes()), dtype=bool)
+        mask = np.zeros(n_genomes, dtype=bool)
+        if len(target) == 7 and all(c in "1234567?" for c in target):
+            genomes = all_genomes()
+            mask[:] = True
+            for i, c in enumerate(target):
+                if c != "?":
+                    mask &= genomes[:, i] == int(c)
+            return mask
+        index = self.frog_index
+        if target in index.species:
+            mask[index.codes_for_species(target)] = True
+        else:
+            variants = [i for i, frog in enumerate(index.frogs) if frog.variant == target]
+            assert len(variants) > 0, f"unknown species, variant or pattern {target}"
+            mask[index.frog_codes[variants]] = True
+        return mask
+    def start_codes(self, start):
+        """Returns the packed codes to start from: those of every variant of
+        a species, or the code of a single genome."""
+        if isinstance(start, (int, np.integer)):
+            return np.array([start], dtype=np.int64)
+        if hasattr(start, "packed"):
+            return np.array([start.packed], dtype=np.int64)
+        if isinstance(start, str) and start in self.frog_index.species:
+            return self.frog_index.codes_for_species(start)
+        return np.array([pack_genetics(str(start))], dtype=np.int64)
+    def children(self, nodes):
+        """Returns an (n_muds, len(nodes)) array of the packed codes produced
+        by applying every distinct mud to every node."""
+        return expand_codes(self.flat_contributions, nodes)
+    def node_children(self, nodes):
+        """Returns the children of the nodes as a (len(nodes), n_muds) array,
+        the faster layout for expanding a frontier."""
+        return expand_grouped(self.grouped_contributions, nodes)
+    def parents(self, nodes, limit=1 << 22):
+        """Generates (codes, muds, sources) triples of arrays listing every
+        genome that a mud turns into one of the nodes: codes[i] becomes
+        nodes[sources[i]] under mud muds[i]. Each triple holds at most about
+        limit genomes, however many preimages the nodes have."""
+        n_muds = len(self.recipes)
+        chunk = max(1, (1 << 20) // n_muds)
+        for begin in range(0, len(nodes), chunk):
+            block = nodes[begin:begin + chunk]
+            digits = block[:, None] // np.array(place_values) % 7
+            # counts[e, i, t] is the number of preimages of trait t of node i
+            # under mud e.
+            counts = self.preimage_counts[:, np.arange(7), digits]
+            totals = counts.prod(axis=-1)
+            muds, sources = np.nonzero(totals)
+            sizes = totals[muds, sources]
+            # Split the (mud, node) pairs so that each group expands to at
+            # most limit genomes (or a single pair, if that is more).
+            ends = np.cumsum(sizes)
+            start = 0
+            while start < len(muds):
+                stop = max(start + 1, int(np.searchsorted(ends, ends[start] - sizes[start] + limit, side="right")))
+                yield self._expand_parents(digits, counts, muds[start:stop], sources[start:stop], begin)
+                start = stop
+    def parent_count(self, nodes, sample=256):
+        """Estimates the number of (mud, parent) pairs of the nodes, that is
+        the cost of expanding them backward, from a sample of them."""
+        if len(nodes) > sample:
+            sample_nodes = nodes[np.linspace(0, len(nodes) - 1, sample).astype(np.int64)]
+        else:
+            sample_nodes = nodes
+        digits = sample_nodes[:, None] // np.array(place_values) % 7
+        total = self.preimage_counts[:, np.arange(7), digits].prod(axis=-1, dtype=np.int64).sum()
+        return total * len(nodes) / max(1, len(sample_nodes))
+    def _expand_parents(self, digits, counts, muds, sources, offset):
+        # Builds the preimage codes one trait at a time, repeating every
+        # partial code once per preimage of the next trait.
+        codes = np.zeros(len(muds), dtype=np.int32)
+        pair = np.arange(len(muds))
+        for t in range(7):
+            repeats = counts[muds[pair], sources[pair], t]
+            codes = np.repeat(codes, repeats)
+            pair = np.repeat(pair, repeats)
+            within = np.arange(len(codes)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+            codes += self.preimages[muds[pair], t, digits[sources[pair], t], within]
+        return codes, muds[pair], sources[pair] + offset
+    def search(self, starts, goal, max_generations=None):
+        """Breadth-first search from an array of packed codes to any genome
+        in a goal mask. Returns the list of (mud id, packed code) pairs along
+        a shortest path, or None if no goal is reachable."""
+        generations = np.full(n_genomes, -1, dtype=np.int16)
+        # Parent edges are stored as mud id * n_genomes + parent code, so
+        # that the mud and the parent are always written together.
+        parent_edge = np.full(n_genomes, -1, dtype=np.int64)
+        starts = np.unique(starts)
+        generations[starts] = 0
+        if goal[starts].any():
+            return []
+        frontier = starts
+        generation = 0
+        n_muds = len(self.recipes)
+        chunk = max(1, (1 << 22) // n_muds)
+        while len(frontier) > 0 and (max_generations is None or generation < max_generations):
+            generation += 1
+            for begin in range(0, len(frontier), chunk):
+                nodes = frontier[begin:begin + chunk]
+                children = self.node_children(nodes).ravel()
+                hits = np.flatnonzero(goal[children])
+                if len(hits) > 0:
+                    source, mud = divmod(int(hits[0]), n_muds)
+                    path = [(mud, int(children[hits[0]]))]
+                    code = int(nodes[source])
+                    while generations[code] > 0:
+                        mud, parent = divmod(int(parent_edge[code]), n_genomes)
+                        path.append((mud, code))
+                        code = parent
+                    return path[::-1]
+                new = np.flatnonzero(generations[children] == -1)
+                codes = children[new]
+                sources, muds = np.divmod(new, n_muds)
+                # Reversed, so that the first mud found for a genome is kept.
+                parent_edge[codes[::-1]] = (muds * n_genomes + nodes[sources])[::-1]
+                generations[codes] = generation
+            frontier = np.flatnonzero(generations == generation)
+        return None
+    def bidirectional_search(self, starts, goal, max_generations=None, goal_key=None):
+        """Bidirectional form of search, with the same arguments and result:
+        expands forward from the start codes and backward from every genome
+        in the goal mask, one generation at a time on whichever side is
+        cheaper to expand, until they meet. If goal_key is given, the search
+        starts from the backward side kept for it by an earlier search or by
+        prepare_goal, if any, and keeps its own backward side for it."""
+        n_muds = len(self.recipes)
+        chunk = max(1, (1 << 22) // n_muds)
+        forward = np.full(n_genomes, -1, dtype=np.int16)
+        # Edges are stored as mud id * n_genomes + code: the parent of each
+        # genome reached forward, and the child of each genome reached
+        # backward.
+        forward_edge = np.full(n_genomes, -1, dtype=np.int64)
+        forward_frontier = np.unique(starts)
+        forward[forward_frontier] = 0
+        cached = self.goal_cache.pop(goal_key, None) if goal_key is not None else None
+        if cached is not None:
+            backward, backward_edge, backward_frontier, depth = cached
+        else:
+            backward, backward_edge, backward_frontier, depth = self._goal_side(goal)
+        depths = [0, depth]
+        reached = backward[forward_frontier]
+        code = None
+        if (reached >= 0).any():
+            reached = np.where(reached >= 0, reached, np.iinfo(np.int16).max)
+            code = int(forward_frontier[np.argmin(reached)])
+        # Once both sides are fully expanded to their current depth without
+        # meeting, any genome reached by expanding one side a generation
+        # further that the other side has reached lies on a shortest route,
+        # so the search stops at the first one found.
+        while code is None:
+            if len(forward_frontier) == 0 or len(backward_frontier) == 0 \
+                    or max_generations is not None and sum(depths) >= max_generations:
+                self._keep_goal(goal_key, backward, backward_edge, backward_frontier, depths[1])
+                return None
+            if len(forward_frontier) * n_muds <= backward_weight * self.parent_count(backward_frontier):
+                depths[0] += 1
+                for begin in range(0, len(forward_frontier), chunk):
+                    nodes = forward_frontier[begin:begin + chunk]
+                    children = self.node_children(nodes).ravel()
+                    new = np.flatnonzero(forward[children] == -1)
+                    codes = children[new]
+                    sources, muds = np.divmod(new, n_muds)
+                    # Reversed, so that the first mud found for a genome is kept.
+                    forward_edge[codes[::-1]] = (muds * n_genomes + nodes[sources])[::-1]
+                    forward[codes] = depths[0]
+                    meeting = np.flatnonzero(backward[codes] >= 0)
+                    if len(meeting) > 0:
+                        code = int(codes[meeting[0]])
+                        break
+                forward_frontier = np.flatnonzero(forward == depths[0])
+            else:
+                depths[1] += 1
+                backward_frontier, code = self._expand_backward(backward, backward_edge, backward_frontier,
+                                                                depths[1], forward)
+        if max_generations is not None and forward[code] + backward[code] > max_generations:
+            self._keep_goal(goal_key, backward, backward_edge, backward_frontier, depths[1])
+            return None
+        path = []
+        node = code
+        while forward[node] > 0:
+            mud, parent = divmod(int(forward_edge[node]), n_genomes)
+            path.append((mud, node))
+            node = parent
+        path.reverse()
+        node = code
+        while backward[node] > 0:
+            mud, child = divmod(int(backward_edge[node]), n_genomes)
+            path.append((mud, child))
+            node = child
+        self._keep_goal(goal_key, backward, backward_edge, backward_frontier, depths[1])
+        return path
+    def _keep_goal(self, goal_key, backward, backward_edge, frontier, depth):
+        # Keeps the backward side of a search for later searches to the same
+        # goal. A frontier of None means that the last backward generation
+        # was cut short when the sides met, so it is dropped, as later
+        # searches rely on every kept generation being complete.
+        if goal_key is None:
+            return
+        if frontier is None:
+            backward[backward == depth] = -1
+            depth -= 1
+            frontier = np.flatnonzero(backward == depth)
+        self.goal_cache[goal_key] = (backward, backward_edge, frontier, depth)
+        while len(self.goal_cache) > goal_cache_size:
+            del self.goal_cache[next(iter(self.goal_cache))]
+    def _goal_side(self, goal):
+        backward = np.full(n_genomes, -1, dtype=np.int16)
+        backward_edge = np.full(n_genomes, -1, dtype=np.int64)
+        frontier = np.flatnonzero(goal)
+        backward[frontier] = 0
+        return backward, backward_edge, frontier, 0
+    def _expand_backward(self, backward, backward_edge, frontier, depth, forward=None):
+        # Marks the parents of the frontier not reached yet with depth, and
+        # returns the new frontier and, if forward is given, the first
+        # parent found that the forward side has reached (None if none, in
+        # which case the level is complete).
+        for codes, muds, sources in self.parents(frontier, limit=1 << 20):
+            new = backward[codes] == -1
+            codes = codes[new]
+            backward_edge[codes[::-1]] = (muds[new] * n_genomes + frontier[sources[new]])[::-1]
+            backward[codes] = depth
+            if forward is not None:
+                meeting = np.flatnonzero(forward[codes] >= 0)
+                if len(meeting) > 0:
+                    return None, int(codes[meeting[0]])
+        return np.flatnonzero(backward == depth), None
+    def prepare_goal(self, target, generations):
+        """Expands the backward side of the search for a target (see
+        goal_mask) by a number of generations and keeps it, so that later
+        plans to that target only search forward from their start until
+        they reach it. Each prepared target takes about 8 MB."""
+        cached = self.goal_cache.pop(target, None)
+        backward, backward_edge, frontier, depth = cached or self._goal_side(self.goal_mask(target))
+        while depth < generations and len(frontier) > 0:
+            depth += 1
+            frontier, _ = self._expand_backward(backward, backward_edge, frontier, depth)
+        self._keep_goal(target, backward, backward_edge, frontier, depth)
+    def plan(self, start, target, max_generations=None, bidirectional=True):
+        """Returns the shortest list of BreedingSteps from a start (species
+        name or genetic code) to a target (see goal_mask), an empty list if
+        the start already matches, or None if the target is unreachable.
+        The bidirectional search is used unless bidirectional is False, and
+        starts from the backward side kept for the target by earlier plans
+        or by prepare_goal, if any; its routes are also kept, so a repeated
+        plan is only a lookup."""
+        if bidirectional:
+            starts = self.start_codes(start)
+            key = (starts.tobytes(), target, max_generations)
+            if key in self.plan_cache:
+                path = self.plan_cache.pop(key)
+            else:
+                goal = None if target in self.goal_cache else self.goal_mask(target)
+                path = self.bidirectional_search(starts, goal, max_generations, target)
+            self.plan_cache[key] = path
+            while len(self.plan_cache) > plan_cache_size:
+                del self.plan_cache[next(iter(self.plan_cache))]
+        else:
+            path = self.search(self.start_codes(start), self.goal_mask(target), max_generations)
+        if path is None:
+            return None
+        return [BreedingStep(self.recipes[mud], unpack_genetics(code), self.frog_index.classify(code))
+                for mud, code in path]
+
+def check_bidirectional_search(seed=0, quick=False):
+    """Checks that the bidirectional search finds routes between random
+    pairs of species, with random generation limits, exactly as short as the
+    forward search, and that every route it returns is valid. Returns the
+    number of routes checked."""
+    rng = random.Random(seed)
+    planner = BreedingPlanner()
+    species = planner.frog_index.species
+    max_generations = 3 if quick else 4
+    queries = [(*rng.sample(species, 2), rng.randint(1, max_generations)) for _ in range(5 if quick else 20)]
+    for start, target, limit in queries:
+        starts = planner.start_codes(start)
+        goal = planner.goal_mask(target)
+        forward = planner.search(starts, goal, limit)
+        path = planner.bidirectional_search(starts, goal, limit)
+        lengths = [None if route is None else len(route) for route in (forward, path)]
+        assert lengths[0] == lengths[1], \
+            f"routes from {start} to {target} of {lengths[0]} generations forward, {lengths[1]} bidirectional"
+        if path:
+            codes = starts
+            for mud, code in path:
+                assert code in planner.children(codes)[mud], f"invalid route {path} from {start} to {target}"
+                codes = np.array([code])
+            assert goal[code], f"route {path} from {start} does not reach {target}"
+    return len(queries)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the bidirectional search against the forward one.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="check fewer and shorter routes")
+    args = parser.parse_args()
+    print(f"{check_bidirectional_search(args.seed, args.quick)} routes checked")
@@ -0,0 +1,90 @@
+# Lazy registry for the collection modules (frog_collection.py,
+# fungi_collection.py, critters_collection.py and flora_collection.py). Each
+# collection declares its entries as a class and keyword arguments instead
+# of constructing them at import time, so importing a collection only
+# records the declarative data. An object is built (and validated) the first
+# time it is accessed by name, either through the catalog or as an
+# attribute of the collection module, and is then kept. Entries can be
+# listed and their declarations inspected without building anything.
+
+import sys
+
+class CatalogRef:
+    """Reference to another entry of the same catalog, used as an argument
+    of a declaration (such as the base frog of a variant) and resolved when
+    the declaring entry is built."""
+    def __init__(self, name):
+        self.name = name
+    def __repr__(self):
+        return f"CatalogRef({self.name!r})"
+
+class Catalog:
+    """An ordered registry of named declarations, built on first access.
+    Iterating over a catalog yields entry names in the order they were
+    registered; values and items build entries one at a time as they are
+    reached."""
+    def __init__(self):
+        self.declarations = {}
+        self.built = {}
+    def register(self, entry_name, factory, /, **kwargs):
+        # Positional-only, since declarations often have a name argument.
+        assert entry_name not in self.declarations, f"duplicate catalog entry {entry_name}"
+        self.declarations[entry_name] = (factory, kwargs)
+    def ref(self, name):
+        return CatalogRef(name)
+    def get(self, name):
+        obj = self.built.get(name)
+        if obj is None:
+            assert name in self.declarations, f"unknown catalog entry {name}"
+            factory, kwargs = self.declarations[name]
+            kwargs = {key: self.get(value.name) if isinstance(value, CatalogRef) else value
+                      for key, value in kwargs.items()}
+            obj = factory(**kwargs)
+            self.built[name] = obj
+        return obj
+    def declaration(self, name):
+        """Returns the (class, keyword arguments) declared for an entry,
+        without building it."""
+        return self.declarations[name]
+    def names(self, factory=None):
+        """Lists entry names, optionally only those declared with a given
+        class (or a subclass of it)."""
+        return [name for name, (entry_factory, kwargs) in self.declarations.items()
+                if factory is None or (isinstance(entry_factory, type) and issubclass(entry_factory, factory))]
+    def is_built(self, name):
+        return name in self.built
+    def __contains__(self, name):
+        return name in self.declarations
+    def __len__(self):
+        return len(self.declarations)
+    def __iter__(self):
+        return iter(self.declarations)
+    def __getitem__(self, name):
+        return self.get(name)
+    def values(self):
+        for name in self.declarations:
+            yield self.get(name)
+    def items(self):
+        for name in self.declarations:
+            yield name, self.get(name)
+    def build_all(self):
+        """Builds (and thereby validates) every entry."""
+        for name in self.declarations:
+            self.get(name)
+    def module_getattr(self, module_name):
+        """Returns a module-level __getattr__ (PEP 562) that builds entries
+        when they are accessed as attributes of the module, and stores them
+        in the module so that later accesses are ordinary lookups."""
+        def __getattr__(name):
+            if name not in self.declarations:
+                raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+            obj = self.get(name)
+            setattr(sys.modules[module_name], name, obj)
+            return obj
+        return __getattr__
+    def module_dir(self, module_name):
+        """Returns a module-level __dir__ listing the catalog entries along
+        with the module's own attributes."""
+        def __dir__():
+            return sorted(set(vars(sys.modules[module_name])) | set(self.declarations))
+        return __dir__
@@ -0,0 +1,134 @@
+# Spawn queries over the critters in critters_collection.py. Every value of
+# every environmental dimension in environment.py (domains, locations,
+# habitats, tile types, weather and times of day) is given one bit position
+# in a 64-bit mask, and each critter's spawn conditions become one mask with
+# the bits of every value it accepts. A set of conditions is encoded the same
+# way, and a critter can spawn under them when the two masks share at least
+# one bit in every dimension. Answering a query is therefore a handful of
+# AND operations over a packed array of critter masks, and many queries (for
+# instance every time of day in a location) are answered at once by
+# broadcasting.
+
+import numpy as np
+
+import critters_collection
+from environment import all_domains, all_locations, all_habitats, \
+    all_tile_types, all_weather
+
+# Times of day in the order they occur, starting from Dawn.
+times_of_day = ("Dawn", "Daytime", "Dusk", "Nighttime")
+
+spawn_dimensions = (
+    ("domain", sorted(all_domains)),
+    ("location", sorted(all_locations)),
+    ("habitat", sorted(all_habitats)),
+    ("tile_type", sorted(all_tile_types)),
+    ("weather", sorted(all_weather)),
+    ("time", list(times_of_day)),
+)
+
+def all_critters():
+    """Returns every critter in critters_collection, in the order defined."""
+    return list(critters_collection.catalog.values())
+
+class CritterIndex:
+    """Bitmask index of critter spawn conditions. The bits dict maps each
+    (dimension, value) pair to its bit position, dimension_masks holds the
+    mask of all bits of each dimension, and masks holds one uint64 spawn
+    mask per critter, in the order the critters were given (computed from
+    the critters unless given)."""
+    def __init__(self, critters=None, masks=None):
+        self.critters = all_critters() if critters is None else list(critters)
+        self.bits = {}
+        self.dimension_masks = {}
+        for dimension, values in spawn_dimensions:
+            self.dimension_masks[dimension] = 0
+            for value in values:
+                self.bits[(dimension, value)] = len(self.bits)
+                self.dimension_masks[dimension] |= 1 << self.bits[(dimension, value)]
+        assert len(self.bits) <= 64, "too many environmental values for a 64-bit mask"
+        if masks is None:
+            masks = np.array([self.spawn_mask(critter) for critter in self.critters], dtype=np.uint64)
+        self.masks = masks
+        self._dimension_array = np.array(list(self.dimension_masks.values()), dtype=np.uint64)
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Builds the index of critters_collection from the spawn masks of a
+        catalog Snapshot (see snapshot.py), without copying them."""
+        critters = all_critters()
+        assert [critter.name for critter in critters] == snapshot.names["critters"], \
+            "the snapshot does not match critters_collection"
+        index = cls(critters, masks=snapshot["critter_masks"])
+        assert [f"{dimension}:{value}" for dimension, value in index.bits] == snapshot.names["critter_bits"], \
+            "the snapshot was built with other environmental values"
+        return index
+    def encode(self, dimension, values):
+        """Returns the mask of one or more values of one dimension, or of the
+        whole dimension if values is None."""
+        if values is None:
+            return self.dimension_masks[dimension]
+        if isinstance(values, str):
+            values = [values]
+        mask = 0
+        for value in values:
+            assert (dimension, value) in self.bits, f"invalid {dimension} {value}"
+            mask |= 1 << self.bits[(dimension, value)]
+        return mask
+    def spawn_mask(self, critter):
+        return (self.encode("domain", critter.domain)
+                | self.encode("location", critter.locations)
+                | self.encode("habitat", critter.habitat)
+                | self.encode("tile_type", critter.tile_types)
+                | self.encode("weather", critter.weather)
+                | self.encode("time", critter.time))
+    def query_mask(self, domain=None, location=None, habitat=None, tile_type=None,
+                   weather=None, time=None):
+        """Encodes a set of conditions. Each argument may be a single value,
+        a collection of acceptable values, or None for any value."""
+        return (self.encode("domain", domain)
+                | self.encode("location", location)
+                | self.encode("habitat", habitat)
+                | self.encode("tile_type", tile_type)
+                | self.encode("weather", weather)
+                | self.encode("time", time))
+    def matches(self, query_mask):
+        """Returns a boolean array marking the critters that can spawn under
+        an encoded set of conditions."""
+        shared = self.masks & np.uint64(query_mask)
+        result = np.ones(len(self.critters), dtype=bool)
+        for dimension_mask in self._dimension_array:
+            result &= (shared & dimension_mask) != 0
+        return result
+    def matches_batch(self, query_masks):
+        """Returns a (Q, C) boolean array answering Q encoded queries for all
+        C critters at once."""
+        shared = np.asarray(query_masks, dtype=np.uint64)[:, None] & self.masks[None, :]
+        result = np.ones(shared.shape, dtype=bool)
+        for dimension_mask in self._dimension_array:
+            result &= (shared & dimension_mask) != 0
+        return result
+    def query(self, **conditions):
+        """Returns the critters that can spawn under the given conditions,
+        with keyword arguments as for query_mask."""
+        return [self.critters[i] for i in np.flatnonzero(self.matches(self.query_mask(**conditions)))]
+    def day_schedule(self, location, weather=None, habitat=None, tile_type=None):
+        """Returns a dict from each time of day to the critters that can
+        spawn in a location. Weather may be a single value, a dict from time
+        of day to weather, or None for any weather."""
+        if not isinstance(weather, dict):
+            weather = {time: weather for time in times_of_day}
+        query_masks = [self.query_mask(location=location, habitat=habitat, tile_type=tile_type,
+                                       weather=weather[time], time=time)
+                       for time in times_of_day]
+        spawns = self.matches_batch(query_masks)
+        return {time: [self.critters[i] for i in np.flatnonzero(spawns[q])]
+                for q, time in enumerate(times_of_day)}
+
+_critter_index = None
+
+def get_critter_index():
+    """Returns a shared CritterIndex over critters_collection."""
+    global _critter_index
+    if _critter_index is None:
+        _critter_index = CritterIndex()
+    return _critter_index
@@ -46,8 +46,8 @@ class Critter:
     def _check_valid(self):
         assert self.flavor in all_flavors
         assert self.domain in all_domains
-        assert set(self.locations).issubset(all_locations), f"invalid locations {", ".join(self.locations)} for critter {self.name}"
+        assert set(self.locations).issubset(all_locations), f"invalid locations {', '.join(self.locations)} for critter {self.name}"
         assert self.habitat in all_habitats
-        assert self.tile_types in all_tile_types
+        assert set(self.tile_types).issubset(all_tile_types)
         assert self.weather in all_weather
         assert self.time in all_times
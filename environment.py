@@ -32,7 +32,9 @@ all_locations = set.union(waking_locations, dream_locations)
 # Habitats are specific features that are required for some critters (bugs)
 # to spawn, in addition to any climate and weather requirements.
 all_habitats = set(("Reeds", "Red Lilies", "Lilypads", "Millipads",
-    "Dream Orchids", "Mother Jellies", "Mahopany Trees", "Marsh Shrubs"))
+    "Dream Orchids", "Mother Jellies", "Mahopany Trees", "Marsh Shrubs",
+    "Azure Hearts", "Beehives", "Croakfeet", "Doorways", "Fragmented Memories",
+    "Gateways", "Stagnant Rushes", "Stone Lanterns"))
 
 # Tile types are the normally-immutable properties of a tile. However,
 # in the Climate Control (and its parallel Frozen Dreams) location only,
@@ -101,3 +103,45 @@ humidity_scale = {
     7:"Waterlogged"
 }
 all_humidities = set(humidity_scale.values())
+
+# Default tile humidity levels as listed above. The remaining tile types are
+# not documented, so deep water is taken to behave like water, stagnant water
+# like mud (the mushrooms native to it grow at Damp without rain), and ice
+# like grass.
+tile_humidity = {
+    "inside":2,
+    "grass":3,
+    "mud":4,
+    "water":5,
+    "deep water":5,
+    "stagnant water":4,
+    "ice":3
+}
+time_temperature = {
+    "Dawn":5,
+    "Daytime":6,
+    "Dusk":5,
+    "Nighttime":3
+}
+all_composts = set(("absorbant", "insulating"))
+
+def derive_conditions(time, weather, tile_type, temperature_machine=0,
+                      humidity_machine=0, compost=None):
+    """Returns the (temperature, humidity) names on a tile at a given time of
+    day and weather, following the rules above. Machine effects are given as
+    the signed number of steps on each scale (machines in overlapping areas
+    are not additive, so this is the effect of a single machine), and compost
+    may be "absorbant" or "insulating"."""
+    assert time in all_times
+    assert weather in all_weather
+    assert tile_type in all_tile_types
+    assert compost is None or compost in all_composts
+    temperature = time_temperature[time] + temperature_machine
+    if weather == "snowing" and compost != "insulating":
+        temperature -= 1
+    humidity = tile_humidity[tile_type] + humidity_machine
+    if weather == "raining" and compost != "absorbant":
+        humidity += 1
+    temperature = max(1, min(7, temperature))
+    humidity = max(1, min(7, humidity))
+    return temperature_scale[temperature], humidity_scale[humidity]
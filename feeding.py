@@ -0,0 +1,214 @@
+# Planning critter hunts to feed a batch of tadpoles. Every tadpole needs
+# food of each flavor its species likes (the flavors of the parent, for a
+# tadpole growing into a different species; see critters.py), so a batch of
+# tadpoles needs the union of their flavors. A hunt happens in a window: one
+# location, at one time of day, in one kind of weather, and the critters
+# that can spawn there and then (see critter_index.py) supply a set of
+# flavors. Since there are only seven flavors, every set of flavors fits in
+# a 7-bit mask, and the cheapest set of windows supplying all the flavors
+# needed is found exactly by dynamic programming over the 128 masks (a
+# weighted set cover, which is tractable here because the universe is so
+# small).
+
+# Windows only combine the weather that occurs in each location (snow rather
+# than rain in Climate Control and Frozen Dreams; see world.py). Some
+# critters also only spawn in a habitat created by a flower (see
+# planting.py), so each window lists, for the critters it relies on, the
+# plantings their habitat needs in its location. If the plantings already
+# in place are given instead, critters whose habitat is not planted there
+# are left out of the window.
+
+from critter_index import get_critter_index, times_of_day
+from critters import all_flavors
+from environment import all_locations, all_weather
+from planting import get_flower_index
+from world import location_weather
+
+flavor_order = sorted(all_flavors)
+flavor_bits = {flavor: 1 << i for i, flavor in enumerate(flavor_order)}
+
+def flavor_mask(flavors):
+    mask = 0
+    for flavor in flavors:
+        assert flavor in flavor_bits, f"invalid flavor {flavor}"
+        mask |= flavor_bits[flavor]
+    return mask
+
+def tadpole_flavors(tadpole):
+    """Returns the flavors needed by a tadpole, given as a frog or as a list
+    of flavors."""
+    return tadpole.flavors if hasattr(tadpole, "flavors") else list(tadpole)
+
+def mask_flavors(mask):
+    return [flavor for flavor in flavor_order if mask & flavor_bits[flavor]]
+
+class HuntWindow:
+    """One place and time to hunt: a location, a time of day and a weather,
+    with the critters that can spawn then, the mask of the flavors they
+    supply, and the cost of going. plantings maps the name of each critter
+    living in a flower's habitat to the plantings (any one of them) that
+    create it in this location."""
+    def __init__(self, location, time, weather, critters, cost=1, plantings=None):
+        self.location = location
+        self.time = time
+        self.weather = weather
+        self.critters = critters
+        self.mask = flavor_mask(critter.flavor for critter in critters)
+        self.cost = cost
+        self.plantings = plantings or {}
+    @property
+    def flavors(self):
+        return mask_flavors(self.mask)
+    def critters_for(self, flavors):
+        return [critter for critter in self.critters if critter.flavor in flavors]
+    def plantings_for(self, critters):
+        """Returns the plantings needed for the given critters to spawn here,
+        the first option for each critter that needs one."""
+        plantings = []
+        for critter in critters:
+            options = self.plantings.get(critter.name)
+            if options and options[0] not in plantings:
+                plantings.append(options[0])
+        return plantings
+    def __repr__(self):
+        return f"HuntWindow({self.location}, {self.time}, {self.weather}, {', '.join(self.flavors)})"
+
+class FeedingPlan:
+    """The windows chosen to feed a batch of tadpoles, and their total cost.
+    Each flavor needed is assigned to the first window of the plan that
+    supplies it, and catches lists, for each window, the critters to catch
+    there for the flavors assigned to it."""
+    def __init__(self, tadpoles, windows, needed):
+        self.tadpoles = tadpoles
+        self.windows = windows
+        self.needed = needed
+        self.cost = sum(window.cost for window in windows)
+        self.assignments = {}
+        for window in windows:
+            for flavor in mask_flavors(window.mask & needed):
+                self.assignments.setdefault(flavor, window)
+    @property
+    def flavors(self):
+        return mask_flavors(self.needed)
+    def catches(self):
+        """Returns (window, critters) pairs: the critters to catch in each
+        window of the plan."""
+        return [(window, window.critters_for([flavor for flavor, assigned in self.assignments.items()
+                                              if assigned is window]))
+                for window in self.windows]
+    def plantings(self):
+        """Returns the plantings the catches of the plan rely on, as
+        (window, plantings) pairs for the windows that need any."""
+        needed = []
+        for window, critters in self.catches():
+            plantings = window.plantings_for(critters)
+            if plantings:
+                needed.append((window, plantings))
+        return needed
+    def windows_for(self, tadpole):
+        """Returns the windows supplying the flavors of one tadpole."""
+        windows = []
+        for flavor in tadpole_flavors(tadpole):
+            if self.assignments[flavor] not in windows:
+                windows.append(self.assignments[flavor])
+        return windows
+    def __len__(self):
+        return len(self.windows)
+    def __iter__(self):
+        return iter(self.windows)
+
+class FeedingPlanner:
+    """Builds every hunting window from a CritterIndex (the shared index of
+    critters_collection by default), optionally restricted to some
+    locations, times of day and weather, and plans hunts for batches of
+    tadpoles. The cost of a window is given by cost(location, time, weather),
+    1 by default, so that plans minimize the number of trips. Critters living
+    in a flower's habitat are looked up in a FlowerIndex (the shared one by
+    default); if planted is given, as (flower name, location) pairs or
+    Plantings, only those planted there are counted, and otherwise every
+    such critter is counted along with the planting it needs."""
+    def __init__(self, critter_index=None, locations=None, times=None, weather=None, cost=None,
+                 flower_index=None, planted=None):
+        self.critter_index = critter_index or get_critter_index()
+        self.flower_index = flower_index or get_flower_index()
+        self.locations = sorted(all_locations) if locations is None else list(locations)
+        self.times = list(times_of_day) if times is None else list(times)
+        self.weather = sorted(all_weather) if weather is None else list(weather)
+        if planted is not None:
+            planted = set((planting.flower.name, planting.location) if hasattr(planting, "flower")
+                          else tuple(planting) for planting in planted)
+        cost = cost or (lambda location, time, weather: 1)
+        keys = [(location, time, weather) for location in self.locations for time in self.times
+                for weather in self.weather if weather in location_weather(location)]
+        spawns = self.critter_index.matches_batch(
+            [self.critter_index.query_mask(location=location, time=time, weather=weather)
+             for location, time, weather in keys]).reshape(len(keys), -1)
+        self.windows = []
+        for (location, time, weather), row in zip(keys, spawns):
+            critters = []
+            plantings = {}
+            for i in row.nonzero()[0]:
+                critter = self.critter_index.critters[i]
+                if critter.habitat in self.flower_index.flowers_for_habitat:
+                    # A critter whose habitat cannot be planted here (or is
+                    # not, when planted is given) cannot spawn here at all.
+                    options = [planting for planting in self.flower_index.plantings_for.get(critter.name, [])
+                               if planting.location == location and
+                               (planted is None or (planting.flower.name, location) in planted)]
+                    if not options:
+                        continue
+                    plantings[critter.name] = options
+                critters.append(critter)
+            if critters:
+                self.windows.append(HuntWindow(location, time, weather, critters,
+                                               cost(location, time, weather), plantings))
+    def needed(self, tadpoles):
+        """Returns the mask of every flavor needed by a batch of tadpoles,
+        given as frogs or as lists of flavors."""
+        mask = 0
+        for tadpole in tadpoles:
+            mask |= flavor_mask(tadpole_flavors(tadpole))
+        return mask
+    def cover(self, needed):
+        """Returns the cheapest list of windows whose flavors include every
+        flavor in the needed mask, preferring fewer windows among plans of
+        equal cost, or None if some flavor cannot be found at all."""
+        # Only the needed part of each window's flavors matters, so keep the
+        # cheapest window for each distinct needed part.
+        candidates = {}
+        for window in self.windows:
+            useful = window.mask & needed
+            if useful and (useful not in candidates or window.cost < candidates[useful].cost):
+                candidates[useful] = window
+        candidates = list(candidates.values())
+        best = {0: (0, 0, None, None)}
+        # Masks only grow when a window is added, so visiting masks in
+        # increasing order settles each one before it is extended.
+        for mask in range(needed + 1):
+            if mask not in best:
+                continue
+            cost, count, _, _ = best[mask]
+            for window in candidates:
+                new_mask = mask | (window.mask & needed)
+                if new_mask == mask:
+                    continue
+                new = (cost + window.cost, count + 1, mask, window)
+                if new_mask not in best or new[:2] < best[new_mask][:2]:
+                    best[new_mask] = new
+        if needed not in best:
+            return None
+        windows = []
+        mask = needed
+        while mask:
+            _, _, mask, window = best[mask]
+            windows.append(window)
+        return windows[::-1]
+    def plan(self, tadpoles):
+        """Returns the FeedingPlan of least cost for a batch of tadpoles, or
+        None if some flavor they need is not available in any window."""
+        tadpoles = list(tadpoles)
+        needed = self.needed(tadpoles)
+        windows = self.cover(needed)
+        if windows is None:
+            return None
+        return FeedingPlan(tadpoles, windows, needed)
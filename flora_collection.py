@@ -1,44 +1,52 @@
+from catalog import Catalog
+from environment import waking_locations, temperate_waking_locations, dream_locations
 from flora import Flower
 
-red_lily = Flower(          name="Red Lily",
+# Entries are built on first access; see catalog.py.
+catalog = Catalog()
+
+catalog.register("red_lily", Flower, name="Red Lily",
     domain="Waking",        locations=temperate_waking_locations,
     tile_type="water",      habitat_created="Red Lilies")
-pink_lily = Flower(         name="Pink Lily",
+catalog.register("pink_lily", Flower, name="Pink Lily",
     domain="Waking",        locations=["Central Junction"],
     tile_type="water")
-red_lotus = Flower(         name="Red Lotus",
+catalog.register("red_lotus", Flower, name="Red Lotus",
     domain="Waking",        locations=["Kindergarten"],
     tile_type="water")
-white_lotus = Flower(       name="White Lotus",
+catalog.register("white_lotus", Flower, name="White Lotus",
     domain="Waking",        locations=temperate_waking_locations,
     tile_type="deep water")
-azure_heart = Flower(       name="Azure Heart",
+catalog.register("azure_heart", Flower, name="Azure Heart",
     domain="Waking",        locations=["Residential District"],
     tile_type="water")
-frosty_crown = Flower(      name="Frosty Crown",
+catalog.register("frosty_crown", Flower, name="Frosty Crown",
     domain="Waking",        locations=["Climate Control"],
     tile_type="water")
-croakfoot = Flower(         name="Croakfoot",
+catalog.register("croakfoot", Flower, name="Croakfoot",
     domain="Waking",        locations=["Climate Control"],
     tile_type="deep water")
-toadflux = Flower(          name="Toadflux",
+catalog.register("toadflux", Flower, name="Toadflux",
     domain="Waking",        locations=["Central Junction"],
     tile_type="grass")
-dream_orchid = Flower(      name="Dream Orchid",
+catalog.register("dream_orchid", Flower, name="Dream Orchid",
     domain="Dream",         locations=dream_locations,
     tile_type="water",      habitat_created="Dream Orchids")
-broken_crown = Flower(      name="Broken Crown",
-    domain="Dreaming",      locations=["Frozen Dreams"],
+catalog.register("broken_crown", Flower, name="Broken Crown",
+    domain="Dream",         locations=["Frozen Dreams"],
     tile_type="water")
-hoppyhock = Flower(         name="Hoppyhock",
+catalog.register("hoppyhock", Flower, name="Hoppyhock",
     domain="Dream",         locations=["Residential District"],
     tile_type="water")
-cherry_bomb = Flower(       name="Cherry Bomb",
+catalog.register("cherry_bomb", Flower, name="Cherry Bomb",
     domain="Dream",         locations=["Future Farms"],
     tile_type="water")
-motherwart = Flower(        name="Motherwart",
+catalog.register("motherwart", Flower, name="Motherwart",
     domain="Dream",         locations=["Memory Works"],
     tile_type="water")
-lost_lotus = Flower(        name="Lost Lotus",
+catalog.register("lost_lotus", Flower, name="Lost Lotus",
     domain="Dream",         locations=dream_locations,
     tile_type="deep water")
+
+__getattr__ = catalog.module_getattr(__name__)
+__dir__ = catalog.module_dir(__name__)
@@ -25,8 +25,61 @@
 # Every species (but not variant) also has a plushie version that can be
 # found or traded for somewhere in the game.
 
+import random
+from functools import total_ordering
+
 from critters import all_flavors
 
+trait_codes = "ANOURES"
+trait_names = {
+    'A': "Amplitude",
+    'N': "Nobility",
+    'O': "Odour",
+    'U': "Umbrage",
+    'R': "Ribbit",
+    'E': "Edacity",
+    'S': "Saturation",
+}
+
+# A complete genetic code can also be stored as a single base-7 integer, with
+# Amplitude as the most significant digit and each digit holding the trait
+# value minus one. Packed codes therefore run from 0 (1111111) to 7**7 - 1
+# (7777777) and sort in the same order as the seven-digit strings, which
+# makes them usable directly as indices into tables over the whole genome
+# space.
+n_genomes = 7 ** 7
+place_values = tuple(7 ** (6 - i) for i in range(7))
+
+def pack_genetics(code):
+    assert len(code) == 7, "invalid genetic code: wrong length"
+    packed = 0
+    for value in map(int, code):
+        assert value >= 1 and value <= 7, f"invalid trait value {value}"
+        packed = packed * 7 + value - 1
+    return packed
+
+def unpack_genetics(packed):
+    assert packed >= 0 and packed < n_genomes, f"invalid packed genetic code {packed}"
+    return "".join(str(packed // place % 7 + 1) for place in place_values)
+
+def adjusted_value(value, operation, scalar):
+    """Returns the new value of a trait after one mud modification, clamped
+    to the valid range of 1 through 7."""
+    match operation:
+        case "add":
+            value += scalar
+        case "mult":
+            value *= scalar
+        case "min":
+            value = 1
+        case "max":
+            value = 7
+        case "suppress":
+            pass
+        case _:
+            assert False, f"invalid operation {operation}"
+    return max(1, min(7, value))
+
 class GeneticTrait(object):
     """This class keeps track of the value of one individual trait in the
     ANOURES acronym. Seven traits are needed to specify one genetic code.
@@ -38,22 +91,10 @@ class GeneticTrait(object):
         self.value = value
         self._check_valid()
     def _check_valid(self):
-        assert self.name in ("Amplitude", "Nobility", "Odour", "Umbrage", "Ribbit", "Edacity", "Saturation")
+        assert self.name in trait_names.values()
         assert self.value >= 1 and self.value <= 7, f"invalid starting trait value {self.value}"
     def adjust(self, operation, scalar):
-        assert operation in ("add", "mult", "min", "max", "suppress"), f"invalid operation {operation}"
-        match operation:
-            case "add":
-                self.value += scalar
-            case "mult":
-                self.value *= scalar
-            case "min":
-                self.value = 1
-            case "max":
-                self.value = 7
-            case "suppress":
-                pass
-        self.value = max(1, min(7, self.value))
+        self.value = adjusted_value(self.value, operation, scalar)
 
 class GeneticCode(object):
     """A genetic code consists of instances of each of the seven traits. This
@@ -70,13 +111,120 @@ class GeneticCode(object):
             'E': GeneticTrait('Edacity',    E),
             'S': GeneticTrait('Saturation', S),
         }
+    def __getitem__(self, trait_code):
+        return self.traits[trait_code].value
+    def __setitem__(self, trait_code, value):
+        assert value >= 1 and value <= 7, f"invalid trait value {value}"
+        self.traits[trait_code].value = value
+    def adjust(self, trait_code, operation, scalar):
+        self.traits[trait_code].adjust(operation, scalar)
+    def __str__(self):
+        return "".join(str(self.traits[code].value) for code in trait_codes)
+
+class PackedTrait:
+    """A lightweight view of one trait of a PackedGeneticCode, created on
+    access so that code written against GeneticCode.traits (reading value,
+    calling adjust) also works with packed genetics. Nothing is stored here
+    beyond a reference to the genetic code and the trait abbreviation."""
+    __slots__ = ("genetic_code", "code")
+    def __init__(self, genetic_code, code):
+        self.genetic_code = genetic_code
+        self.code = code
+    @property
+    def name(self):
+        return trait_names[self.code]
+    @property
+    def value(self):
+        return self.genetic_code[self.code]
+    @value.setter
+    def value(self, value):
+        self.genetic_code[self.code] = value
+    def adjust(self, operation, scalar):
+        self.genetic_code.adjust(self.code, operation, scalar)
+
+class PackedTraits:
+    """Mapping-like view from trait abbreviation to PackedTrait, mirroring
+    the traits dict of GeneticCode."""
+    __slots__ = ("genetic_code",)
+    def __init__(self, genetic_code):
+        self.genetic_code = genetic_code
+    def __getitem__(self, code):
+        assert code in trait_codes and len(code) == 1, f"invalid trait code {code}"
+        return PackedTrait(self.genetic_code, code)
+    def __iter__(self):
+        return iter(trait_codes)
+    def __len__(self):
+        return 7
+    def keys(self):
+        return list(trait_codes)
+    def values(self):
+        return [self[code] for code in trait_codes]
+    def items(self):
+        return [(code, self[code]) for code in trait_codes]
+
+@total_ordering
+class PackedGeneticCode:
+    """A compact genetic code holding all seven traits in one base-7 integer
+    (see pack_genetics). It supports the same trait access and mutation as
+    GeneticCode, in place with adjust or as a copy with adjusted, and it
+    hashes and orders by the packed integer so that codes can be used
+    directly as dict keys and set members. As with any mutable key, a code
+    must not be adjusted in place while it is stored in a dict or set."""
+    __slots__ = ("packed",)
+    def __init__(self, code):
+        if isinstance(code, PackedGeneticCode):
+            self.packed = code.packed
+        elif isinstance(code, int):
+            assert code >= 0 and code < n_genomes, f"invalid packed genetic code {code}"
+            self.packed = code
+        else:
+            self.packed = pack_genetics(str(code))
+    @property
+    def traits(self):
+        return PackedTraits(self)
+    def __getitem__(self, trait_code):
+        return self.packed // place_values[trait_codes.index(trait_code)] % 7 + 1
+    def __setitem__(self, trait_code, value):
+        assert value >= 1 and value <= 7, f"invalid trait value {value}"
+        place = place_values[trait_codes.index(trait_code)]
+        self.packed += (value - 1 - self.packed // place % 7) * place
+    def adjust(self, trait_code, operation, scalar):
+        self[trait_code] = adjusted_value(self[trait_code], operation, scalar)
+    def adjusted(self, trait_code, operation, scalar):
+        new_code = self.copy()
+        new_code.adjust(trait_code, operation, scalar)
+        return new_code
+    def copy(self):
+        return PackedGeneticCode(self.packed)
+    def __int__(self):
+        return self.packed
+    def __index__(self):
+        return self.packed
+    def __hash__(self):
+        return hash(self.packed)
+    def __eq__(self, other):
+        if not isinstance(other, PackedGeneticCode):
+            return NotImplemented
+        return self.packed == other.packed
+    def __lt__(self, other):
+        if not isinstance(other, PackedGeneticCode):
+            return NotImplemented
+        return self.packed < other.packed
+    def __str__(self):
+        return unpack_genetics(self.packed)
+    def __repr__(self):
+        return f"PackedGeneticCode('{self}')"
 
 class Frog(object):
     """The frog base class establishes record keeping for species, including
     its genetic makeup, canonical genetics (as defined in the encyclopedia,
     which describe the genetic makeup that triggers mutation to that species),
     name, abbreviation, variant (defined in a subclass), and flavors preferred
-    by the species."""
+    by the species. The genetic_code_class attribute selects the storage
+    used for genetics given as a string; set it to PackedGeneticCode to hold
+    large numbers of frogs compactly. Genetics may also be passed as an
+    existing GeneticCode or PackedGeneticCode instance, which is used as is."""
+    genetic_code_class = GeneticCode
     def __init__(self,
                  genetics,
                  canonical_genetics=None,
@@ -85,7 +233,10 @@ class Frog(object):
                  variant=None,
                  variant_abbrev=None,
                  flavors=""):
-        self.genetics = GeneticCode(genetics)
+        if isinstance(genetics, (GeneticCode, PackedGeneticCode)):
+            self.genetics = genetics
+        else:
+            self.genetics = self.genetic_code_class(genetics)
         self.canonical_genetics = canonical_genetics or self.genetics
         self.species = species
         self.species_abbrev = self.get_abbreviation(species_abbrev, species)
@@ -98,7 +249,24 @@ class Frog(object):
         initials = "".join([word[0].upper() for word in name.split()])
         if len(initials) > 2: initials = initials[:2]
         return initials
-    # TODO: define inheritance of offspring
+    def spawn(self, other, rng=random, classify=None):
+        """Returns one offspring of this frog and another. Each trait is
+        inherited from either parent with equal probability, using rng (any
+        object with a choice method, such as random.Random). The offspring
+        keeps the species, variant and flavors of this frog, unless classify
+        (such as FrogIndex.classify) finds a listed frog with its genetic
+        code, in which case it takes those of that frog instead. Its
+        genetics are stored in the same class as this frog's. See
+        population.py for spawning whole populations at once."""
+        code = "".join(rng.choice(pair) for pair in zip(str(self.genetics), str(other.genetics)))
+        match = classify(code) if classify is not None else None
+        source = match or self
+        return Frog(type(self.genetics)(code),
+                    canonical_genetics=source.canonical_genetics,
+                    species=source.species,
+                    species_abbrev=source.species_abbrev,
+                    variant=source.variant,
+                    flavors=", ".join(source.flavors))
 
 class FrogVariant(Frog):
     """The variant subclass of the Frog base class simplifies instantiation
@@ -109,8 +277,9 @@ class FrogVariant(Frog):
                  genetics,
                  variant_name,
                  base_frog):
-        super(self).__init__(genetics,
-                             canonical_genetics=base_frog.canonical_genetics,
-                             species=base_frog.species,
-                             variant=variant_name,
-                             flavors=base_frog.flavors)
+        super().__init__(genetics,
+                         canonical_genetics=base_frog.canonical_genetics,
+                         species=base_frog.species,
+                         species_abbrev=base_frog.species_abbrev,
+                         variant=variant_name,
+                         flavors=", ".join(base_frog.flavors))
@@ -1,378 +1,385 @@
+from catalog import Catalog
 from frog import Frog, FrogVariant
 
-common_green = Frog(
+# Entries are built on first access; see catalog.py.
+catalog = Catalog()
+
+catalog.register("common_green", Frog,
     genetics="4444444",
     species="Common Green",
     flavors="Salty")
-pungent_green = FrogVariant(
+catalog.register("pungent_green", FrogVariant,
     genetics="4664444",
     variant_name="Pungent Green",
-    base_frog=common_green)
-greater_green = FrogVariant(
+    base_frog=catalog.ref("common_green"))
+catalog.register("greater_green", FrogVariant,
     genetics="6454744",
     variant_name="Greater Green",
-    base_frog=common_green)
+    base_frog=catalog.ref("common_green"))
 
-vast_mudlurker = Frog(
+catalog.register("vast_mudlurker", Frog,
     genetics="7444444",
     species="Vast Mudlurker",
     flavors="Sweet")
-poor_mudlurker = FrogVariant(
+catalog.register("poor_mudlurker", FrogVariant,
     genetics="7344444",
     variant_name="Poor Mudlurker",
-    base_frog=vast_mudlurker)
-royal_mudlurker = FrogVariant(
+    base_frog=catalog.ref("vast_mudlurker"))
+catalog.register("royal_mudlurker", FrogVariant,
     genetics="7554444",
     variant_name="Royal Mudlurker",
-    base_frog=vast_mudlurker)
+    base_frog=catalog.ref("vast_mudlurker"))
 
-long_legged_dazzler = Frog(
+catalog.register("long_legged_dazzler", Frog,
     genetics="4774444",
     species="Long-Legged Dazzler",
     flavors="Bitter")
-longer_legged_dazzler = FrogVariant(
+catalog.register("longer_legged_dazzler", FrogVariant,
     genetics="5774444",
     variant_name="Longer-Legged Dazzler",
-    base_frog=long_legged_dazzler)
-long_winded_dazzler = FrogVariant(
+    base_frog=catalog.ref("long_legged_dazzler"))
+catalog.register("long_winded_dazzler", FrogVariant,
     genetics="4774441", # S=1,2,3
     variant_name="Long-Winded Dazzler",
-    base_frog=long_legged_dazzler)
+    base_frog=catalog.ref("long_legged_dazzler"))
 
-furious_lurker = Frog(
+catalog.register("furious_lurker", Frog,
     genetics="4447474",
     species="Furious Lurker",
     flavors="Salty, Sweet")
-obvious_lurker = Frog(
+catalog.register("obvious_lurker", FrogVariant,
     genetics="4447574",
     variant_name="Obvious Lurker",
-    base_frog=furious_lurker)
-rancid_lurker = FrogVariant(
+    base_frog=catalog.ref("furious_lurker"))
+catalog.register("rancid_lurker", FrogVariant,
     genetics="4257474",
     variant_name="Rancid Lurker",
-    base_frog=furious_lurker)
+    base_frog=catalog.ref("furious_lurker"))
 
-weeny_sponge = Frog(
+catalog.register("weeny_sponge", Frog,
     genetics="1444441",
     species="Weeny Sponge",
     flavors="Bitter")
-hungry_sponge = FrogVariant(
+catalog.register("hungry_sponge", FrogVariant,
     genetics="1444471",
     variant_name="Hungry Sponge",
-    base_frog=weeny_sponge)
-sleeping_sponge = FrogVariant(
+    base_frog=catalog.ref("weeny_sponge"))
+catalog.register("sleeping_sponge", FrogVariant,
     genetics="1555551",
     variant_name="Sleeping Sponge",
-    base_frog=weeny_sponge)
+    base_frog=catalog.ref("weeny_sponge"))
 
-dozy_dreamer = Frog(
+catalog.register("dozy_dreamer", Frog,
     genetics="5555555",
     species="Dozy Dreamer",
     flavors="Slimy")
-burly_dreamer = FrogVariant(
+catalog.register("burly_dreamer", FrogVariant,
     genetics="7555554",
     variant_name="Burly Dreamer",
-    base_frog=dozy_dreamer)
-polished_dreamer = FrogVariant(
+    base_frog=catalog.ref("dozy_dreamer"))
+catalog.register("polished_dreamer", FrogVariant,
     genetics="5445555",
     variant_name="Polished Dreamer",
-    base_frog=dozy_dreamer)
+    base_frog=catalog.ref("dozy_dreamer"))
 
-grubby_rascal = Frog(
+catalog.register("grubby_rascal", Frog,
     genetics="5175555",
     species="Grubby Rascal",
     flavors="Spicy, Sour")
-starving_rascal = FrogVariant(
+catalog.register("starving_rascal", FrogVariant,
     genetics="5175575",
     variant_name="Starving Rascal",
-    base_frog=grubby_rascal)
-common_rascal = FrogVariant(
+    base_frog=catalog.ref("grubby_rascal"))
+catalog.register("common_rascal", FrogVariant,
     genetics="4174444",
     variant_name="Common Rascal",
-    base_frog=grubby_rascal)
+    base_frog=catalog.ref("grubby_rascal"))
 
-pocket_snoozer = Frog(
+catalog.register("pocket_snoozer", Frog,
     genetics="1555555",
     species="Pocket Snoozer",
     flavors="Umami")
-silent_snoozer = FrogVariant(
+catalog.register("silent_snoozer", FrogVariant,
     genetics="1554455",
     variant_name="Silent Snoozer",
-    base_frog=pocket_snoozer)
-damp_snoozer = FrogVariant(
-    genetics="155557",
+    base_frog=catalog.ref("pocket_snoozer"))
+catalog.register("damp_snoozer", FrogVariant,
+    genetics="1555557",
     variant_name="Damp Snoozer",
-    base_frog=pocket_snoozer)
+    base_frog=catalog.ref("pocket_snoozer"))
 
-pristine_peacheyes = Frog(
+catalog.register("pristine_peacheyes", Frog,
     genetics="1414444",
     species="Pristine Peach-eyes",
     flavors="Sour")
-preening_peacheyes = FrogVariant(
+catalog.register("preening_peacheyes", FrogVariant,
     genetics="1614444",
     variant_name="Preening Peach-eyes",
-    base_frog=pristine_peacheyes)
-pristine_redeyes = FrogVariant(
+    base_frog=catalog.ref("pristine_peacheyes"))
+catalog.register("pristine_redeyes", FrogVariant,
     genetics="1415544",
     variant_name="Pristine Red-eyes",
-    base_frog=pristine_peacheyes)
+    base_frog=catalog.ref("pristine_peacheyes"))
 
-spotless_napper = Frog(
+catalog.register("spotless_napper", Frog,
     genetics="5515555",
     species="Spotless Napper",
     flavors="Sweet, Spicy")
-slippery_napper = FrogVariant(
+catalog.register("slippery_napper", FrogVariant,
     genetics="1515555",
     variant_name="Slippery Napper",
-    base_frog=spotless_napper)
-spotless_nipper = FrogVariant(
+    base_frog=catalog.ref("spotless_napper"))
+catalog.register("spotless_nipper", FrogVariant,
     genetics="4414444",
     variant_name="Spotless Nipper",
-    base_frog=spotless_napper)
+    base_frog=catalog.ref("spotless_napper"))
 
-dripping_giant = Frog(
+catalog.register("dripping_giant", Frog,
     genetics="7444447",
     species="Dripping Giant",
     flavors="Salty")
-dripping_sleeper = Frog(
+catalog.register("dripping_sleeper", FrogVariant,
     genetics="7555557",
     variant_name="Dripping Sleeper",
-    base_frog=dripping_giant)
-contented_giant = FrogVariant(
+    base_frog=catalog.ref("dripping_giant"))
+catalog.register("contented_giant", FrogVariant,
     genetics="7444437",
     variant_name="Contented Giant",
-    base_frog=dripping_giant)
+    base_frog=catalog.ref("dripping_giant"))
 
-foul_screamer = Frog(
+catalog.register("foul_screamer", Frog,
     genetics="4474744",
     species="Foul Screamer",
     flavors="Sour")
-hazy_screamer = FrogVariant(
+catalog.register("hazy_screamer", FrogVariant,
     genetics="4274744",
     variant_name="Hazy Screamer",
-    base_frog=foul_screamer)
-flooded_screamer = FrogVariant(
+    base_frog=catalog.ref("foul_screamer"))
+catalog.register("flooded_screamer", FrogVariant,
     genetics="4474746",
     variant_name="Flooded Screamer",
-    base_frog=foul_screamer)
+    base_frog=catalog.ref("foul_screamer"))
 
-drowsy_deluge = Frog(
+catalog.register("drowsy_deluge", Frog,
     genetics="5155557",
     species="Drowsy Deluge",
     flavors="Sweet, Slimy")
-noisy_deluge = FrogVariant(
+catalog.register("noisy_deluge", FrogVariant,
     genetics="5155757",
     variant_name="Noisy Deluge",
-    base_frog=drowsy_deluge)
-trivial_deluge = FrogVariant(
+    base_frog=catalog.ref("drowsy_deluge"))
+catalog.register("trivial_deluge", FrogVariant,
     genetics="4144447",
     variant_name="Trivial Deluge",
-    base_frog=drowsy_deluge)
+    base_frog=catalog.ref("drowsy_deluge"))
 
-blackeyed_bawler = Frog(
+catalog.register("blackeyed_bawler", Frog,
     genetics="7444744",
     species="Black-eyed Bawler",
     flavors="Sweet")
-shuteyed_bawler = FrogVariant(
+catalog.register("shuteyed_bawler", FrogVariant,
     genetics="7544744",
     variant_name="Shut-eyed Bawler",
-    base_frog=blackeyed_bawler)
-funky_brawler = FrogVariant(
+    base_frog=catalog.ref("blackeyed_bawler"))
+catalog.register("funky_brawler", FrogVariant,
     genetics="7555764",
     variant_name="Funky Brawler",
-    base_frog=blackeyed_bawler)
+    base_frog=catalog.ref("blackeyed_bawler"))
 
-redbacked_fury = Frog(
+catalog.register("redbacked_fury", Frog,
     genetics="4447747",
     species="Red-Backed Fury",
     flavors="Spicy")
-smallbacked_fury = FrogVariant(
+catalog.register("smallbacked_fury", FrogVariant,
     genetics="3437747",
     variant_name="Small-Backed Fury",
-    base_frog=redbacked_fury)
-redbacked_feaster = Frog(
+    base_frog=catalog.ref("redbacked_fury"))
+catalog.register("redbacked_feaster", FrogVariant,
     genetics="4477777",
     variant_name="Red-Backed Feaster",
-    base_frog=redbacked_fury)
+    base_frog=catalog.ref("redbacked_fury"))
 
-wilted_skulker = Frog(
+catalog.register("wilted_skulker", Frog,
     genetics="5511551",
     species="Wilted Skulker",
     flavors="Salty, Slimy")
-wilted_sulker = FrogVariant(
+catalog.register("wilted_sulker", FrogVariant,
     genetics="5551451",
     variant_name="Wilted Sulker",
-    base_frog=wilted_skulker)
-banal_skulker = Frog(
+    base_frog=catalog.ref("wilted_skulker"))
+catalog.register("banal_skulker", FrogVariant,
     genetics="4411441",
     variant_name="Banal Skulker",
-    base_frog=wilted_skulker)
+    base_frog=catalog.ref("wilted_skulker"))
 
-frosty_hollow = Frog(
+catalog.register("frosty_hollow", Frog,
     genetics="4441474",
     species="Frosty Hollow",
     flavors="Umami")
-damp_hollow = Frog(
+catalog.register("damp_hollow", FrogVariant,
     genetics="4441477",
     variant_name="Damp Hollow",
-    base_frog=frosty_hollow)
-frosty_hollerer = Frog(
+    base_frog=catalog.ref("frosty_hollow"))
+catalog.register("frosty_hollerer", FrogVariant,
     genetics="4441674",
     variant_name="Frosty Hollerer",
-    base_frog=frosty_hollow)
+    base_frog=catalog.ref("frosty_hollow"))
 
-reeking_sneaker = Frog(
+catalog.register("reeking_sneaker", Frog,
     genetics="4774144",
     species="Reeking Sneaker",
     flavors="Bitter")
-raging_sneaker = FrogVariant(
+catalog.register("raging_sneaker", FrogVariant,
     genetics="4777174",
     variant_name="Raging Sneaker",
-    base_frog=reeking_sneaker)
-fleeting_sneaker = FrogVariant(
+    base_frog=catalog.ref("reeking_sneaker"))
+catalog.register("fleeting_sneaker", FrogVariant,
     genetics="5775155",
     variant_name="Fleeting Sneaker",
-    base_frog=reeking_sneaker)
+    base_frog=catalog.ref("reeking_sneaker"))
 
-dinky_furnace = Frog(
+catalog.register("dinky_furnace", Frog,
     genetics="1557155",
     species="Dinky Furnace",
     flavors="Bitter, Slimy")
-stinky_furnace = FrogVariant(
+catalog.register("stinky_furnace", FrogVariant,
     genetics="1577155",
     variant_name="Stinky Furnace",
-    base_frog=dinky_furnace)
-dusty_furnace = Frog(
+    base_frog=catalog.ref("dinky_furnace"))
+catalog.register("dusty_furnace", FrogVariant,
     genetics="1357153",
     variant_name="Dusty Furnace",
-    base_frog=dinky_furnace)
+    base_frog=catalog.ref("dinky_furnace"))
 
-peaceful_spadefoot = Frog(
+catalog.register("peaceful_spadefoot", Frog,
     genetics="5551115",
     species="Peaceful Spadefoot",
     flavors="Sour, Sweet")
-subdued_spadefoot = FrogVariant(
+catalog.register("subdued_spadefoot", FrogVariant,
     genetics="3331115",
     variant_name="Subdued Spadefoot",
-    base_frog=peaceful_spadefoot)
-plain_spadefoot = FrogVariant(
+    base_frog=catalog.ref("peaceful_spadefoot"))
+catalog.register("plain_spadefoot", FrogVariant,
     genetics="4441114",
     variant_name="Plain Spadefoot",
-    base_frog=peaceful_spadefoot)
+    base_frog=catalog.ref("peaceful_spadefoot"))
 
-bloated_thunder = Frog(
+catalog.register("bloated_thunder", Frog,
     genetics="7444774",
     species="Bloated Thunder",
     flavors="Spicy")
-storming_thunder = FrogVariant(
+catalog.register("storming_thunder", FrogVariant,
     genetics="7465774",
     variant_name="Storming Thunder",
-    base_frog=bloated_thunder)
-sleepless_night = Frog(
+    base_frog=catalog.ref("bloated_thunder"))
+catalog.register("sleepless_night", FrogVariant,
     genetics="7555775",
     variant_name="Sleepless Night",
-    base_frog=bloated_thunder)
+    base_frog=catalog.ref("bloated_thunder"))
 
-soggy_marcher = Frog(
+catalog.register("soggy_marcher", Frog,
     genetics="1234567",
     species="Soggy Marcher",
     flavors="Salty")
-expanded_marcher = FrogVariant(
+catalog.register("expanded_marcher", FrogVariant,
     genetics="7234567",
     variant_name="Expanded Marcher",
-    base_frog=soggy_marcher)
-arid_marcher = FrogVariant(
+    base_frog=catalog.ref("soggy_marcher"))
+catalog.register("arid_marcher", FrogVariant,
     genetics="1234561",
     variant_name="Arid Marcher",
-    base_frog=soggy_marcher)
+    base_frog=catalog.ref("soggy_marcher"))
 
-waning_bullfrog = Frog(
+catalog.register("waning_bullfrog", Frog,
     genetics="7654321",
     species="Waning Bullfrog",
     flavors="Salty")
-waxing_bullfrog = FrogVariant(
+catalog.register("waxing_bullfrog", FrogVariant,
     genetics="1654327",
     variant_name="Waxing Bullfrog",
-    base_frog=waning_bullfrog)
-drenched_bullfrog = FrogVariant(
+    base_frog=catalog.ref("waning_bullfrog"))
+catalog.register("drenched_bullfrog", FrogVariant,
     genetics="7654327",
     variant_name="Drenched Bullfrog",
-    base_frog=waning_bullfrog)
+    base_frog=catalog.ref("waning_bullfrog"))
 
-stubby_scamp = Frog(
+catalog.register("stubby_scamp", Frog,
     genetics="1111111",
     species="Stubby Scamp",
     flavors="Salty")
-bothered_scamp = FrogVariant(
+catalog.register("bothered_scamp", FrogVariant,
     genetics="1112111",
     variant_name="Bothered Scamp",
-    base_frog=stubby_scamp)
-slimy_scamp = FrogVariant(
+    base_frog=catalog.ref("stubby_scamp"))
+catalog.register("slimy_scamp", FrogVariant,
     genetics="1111112",
     variant_name="Slimy Scamp",
-    base_frog=stubby_scamp)
+    base_frog=catalog.ref("stubby_scamp"))
 
-towering_prince = Frog(
+catalog.register("towering_prince", Frog,
     genetics="7777777",
     species="Towering Prince",
     flavors="Salty")
-lukewarm_prince = FrogVariant(
+catalog.register("lukewarm_prince", FrogVariant,
     genetics="7676767",
     variant_name="Lukewarm Prince",
-    base_frog=towering_prince)
-serene_prince = FrogVariant(
+    base_frog=catalog.ref("towering_prince"))
+catalog.register("serene_prince", FrogVariant,
     genetics="7771777",
     variant_name="Serene Prince",
-    base_frog=towering_prince)
+    base_frog=catalog.ref("towering_prince"))
 
-secondrate_prowler = Frog(
+catalog.register("secondrate_prowler", Frog,
     genetics="2222222",
     species="Second-rate Prowler",
     flavors="Salty")
-shameless_prowler = Frog(
+catalog.register("shameless_prowler", FrogVariant,
     genetics="2121212",
     variant_name="Shameless Prowler",
-    base_frog=secondrate_prowler)
-sizzling_prowler = FrogVariant(
+    base_frog=catalog.ref("secondrate_prowler"))
+catalog.register("sizzling_prowler", FrogVariant,
     genetics="2227222",
     variant_name="Sizzling Prowler",
-    base_frog=secondrate_prowler)
+    base_frog=catalog.ref("secondrate_prowler"))
 
-imperfect_blabber = Frog(
+catalog.register("imperfect_blabber", Frog,
     genetics="6666666",
     species="Imperfect Blabber",
     flavors="Salty")
-perfect_blabber = FrogVariant(
+catalog.register("perfect_blabber", FrogVariant,
     genetics="6766666",
     variant_name="Perfect Blabber",
-    base_frog=imperfect_blabber)
-incessant_blabber = FrogVariant(
+    base_frog=catalog.ref("imperfect_blabber"))
+catalog.register("incessant_blabber", FrogVariant,
     genetics="6666766",
     variant_name="Incessant Blabber",
-    base_frog=imperfect_blabber)
+    base_frog=catalog.ref("imperfect_blabber"))
 
-lowgrade_croaker = Frog(
+catalog.register("lowgrade_croaker", Frog,
     genetics="3333333",
     species="Low-Grade Croaker",
     flavors="Salty")
-lowlevel_croaker = FrogVariant(
+catalog.register("lowlevel_croaker", FrogVariant,
     genetics="2333332",
     variant_name="Low-Level Croaker",
-    base_frog=lowgrade_croaker)
-worthless_croaker = FrogVariant(
+    base_frog=catalog.ref("lowgrade_croaker"))
+catalog.register("worthless_croaker", FrogVariant,
     genetics="3232323",
     variant_name="Worthless Croaker",
-    base_frog=lowgrade_croaker)
+    base_frog=catalog.ref("lowgrade_croaker"))
 
-sublime_empyrean = Frog(
+catalog.register("sublime_empyrean", Frog,
     genetics="7177777",
     species="Sublime Empyrean",
     flavors="Salty")
-sleeping_empyrean = FrogVariant(
+catalog.register("sleeping_empyrean", FrogVariant,
     genetics="7177777", # no change; mature tadpoles in Dream
     variant_name="Sleeping Empyrean",
-    base_frog=sublime_empyrean)
-true_empyrean = FrogVariant(
+    base_frog=catalog.ref("sublime_empyrean"))
+catalog.register("true_empyrean", FrogVariant,
     genetics="7177777", # no change; breed in one step from Prince
     variant_name="True Empyrean",
-    base_frog=sublime_empyrean)
\ No newline at end of file
+    base_frog=catalog.ref("sublime_empyrean"))
+
+__getattr__ = catalog.module_getattr(__name__)
+__dir__ = catalog.module_dir(__name__)
@@ -0,0 +1,107 @@
+# Classification of genomes into the species and variants listed in
+# frog_collection.py. A genetic change only changes the species (or variant)
+# of a frog when the new seven-number code matches the code of another
+# species or variant, so classification is an exact lookup of the packed
+# genetic code (see frog.py) in a dense table covering the whole genome
+# space. Genomes that match no listed frog keep their previous species.
+
+# A few variants share their code with the base species (for instance the
+# Sleeping and True Empyreans, which differ only in how they are bred). The
+# dense table returns the first frog defined for a code, which is always the
+# base species when it is involved, and matches_for returns all of them.
+
+import numpy as np
+
+import frog_collection
+from frog import n_genomes, pack_genetics
+from genomes import pack_genomes
+
+def all_frogs():
+    """Returns every species and variant in frog_collection, in the order
+    they are defined."""
+    return list(frog_collection.catalog.values())
+
+class FrogIndex:
+    """Dense lookup from packed genetic code to the frogs in a collection.
+    Frogs are numbered in the order given, and species are numbered in the
+    order their first frog appears. The frog_lookup and species_lookup
+    arrays hold one entry per genome (-1 where no frog matches), so lookups
+    are O(1) for single codes and a single fancy-indexing operation for
+    arrays of codes."""
+    def __init__(self, frogs=None):
+        self.frogs = all_frogs() if frogs is None else list(frogs)
+        assert len(self.frogs) < np.iinfo(np.int16).max, "too many frogs to index"
+        self.species = []
+        species_ids = {}
+        for frog in self.frogs:
+            if frog.species not in species_ids:
+                species_ids[frog.species] = len(self.species)
+                self.species.append(frog.species)
+        self.frog_species = np.array([species_ids[frog.species] for frog in self.frogs], dtype=np.int16)
+        self.frog_codes = np.array([pack_genetics(str(frog.genetics)) for frog in self.frogs], dtype=np.int64)
+        self.frog_lookup = np.full(n_genomes, -1, dtype=np.int16)
+        # Assign in reverse so that the first frog defined for a code wins.
+        for i in reversed(range(len(self.frogs))):
+            self.frog_lookup[self.frog_codes[i]] = i
+        self.species_lookup = np.where(self.frog_lookup >= 0,
+                                       self.frog_species[self.frog_lookup], -1).astype(np.int16)
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Builds the index of frog_collection from the arrays of a catalog
+        Snapshot (see snapshot.py), without copying the lookup tables."""
+        index = cls.__new__(cls)
+        index.frogs = all_frogs()
+        assert [frog.variant or frog.species for frog in index.frogs] == snapshot.names["frogs"], \
+            "the snapshot does not match frog_collection"
+        index.species = list(snapshot.names["species"])
+        index.frog_species = snapshot["frog_species"]
+        index.frog_codes = snapshot["frog_codes"]
+        index.frog_lookup = snapshot["frog_lookup"]
+        index.species_lookup = snapshot["species_lookup"]
+        return index
+    def species_id(self, species):
+        return self.species.index(species)
+    def variant_name(self, frog_id):
+        frog = self.frogs[frog_id]
+        return frog.variant or frog.species
+    def classify(self, genetics):
+        """Returns the frog matching a genetic code (a string, packed integer
+        or genetic code object), or None if no species or variant has it."""
+        frog_id = self.frog_lookup[self._packed(genetics)]
+        return self.frogs[frog_id] if frog_id >= 0 else None
+    def matches_for(self, genetics):
+        """Returns every frog whose code is exactly the given genetic code."""
+        packed = self._packed(genetics)
+        return [self.frogs[i] for i in np.flatnonzero(self.frog_codes == packed)]
+    def frog_ids(self, packed):
+        """Batched lookup of frog ids (-1 for no match) for an array of
+        packed genetic codes."""
+        return self.frog_lookup[np.asarray(packed, dtype=np.int64)]
+    def species_ids(self, packed):
+        """Batched lookup of species ids (-1 for no match) for an array of
+        packed genetic codes."""
+        return self.species_lookup[np.asarray(packed, dtype=np.int64)]
+    def classify_genomes(self, genomes):
+        """Batched lookup of frog ids for an (N, 7) array of trait values."""
+        return self.frog_ids(pack_genomes(genomes))
+    def flavors(self, frog_ids):
+        return [self.frogs[i].flavors if i >= 0 else None for i in frog_ids]
+    def codes_for_species(self, species):
+        """Returns the packed codes of the base species and its variants."""
+        species_id = self.species_id(species)
+        return np.unique(self.frog_codes[self.frog_species == species_id])
+    def _packed(self, genetics):
+        if isinstance(genetics, (int, np.integer)):
+            return int(genetics)
+        if hasattr(genetics, "packed"):
+            return genetics.packed
+        return pack_genetics(str(genetics))
+
+_frog_index = None
+
+def get_frog_index():
+    """Returns a shared FrogIndex over frog_collection, built on first use."""
+    global _frog_index
+    if _frog_index is None:
+        _frog_index = FrogIndex()
+    return _frog_index
@@ -11,8 +11,17 @@
 # conditions for either of the two contributing species, however, which may
 # mean they can be grown in either the Dream or the Waking domain.
 
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+
 from environment import all_domains, all_tile_types, all_temperatures, \
     all_humidities, all_weather
+from frog import adjusted_value
+
+# The compiled table of a mud that changes nothing (see Mud.compile).
+identity_table = np.tile(np.arange(1, 8, dtype=np.uint8), (7, 1))
 
 class SingleTraitModifier:
     def __init__(self, trait_code, scalar=0, operation="add"):
@@ -46,16 +55,15 @@ class SingleTraitModifier:
         but useful to have implemented at this level for e.g. checking how
         a specific modification _would_ affect a frog, which is functionality
         enabled in-game."""
-        trait = gen_code.traits[self.code]
-        trait.adjust(self.operation, self.scalar)
+        gen_code.adjust(self.code, self.operation, self.scalar)
 
 class MultiTraitModifier:
-        """A multi-trait modifier aggregates modifications to a given trait
-        from multiple sources, either as a hybrid mushroom or as the first
-        step in mixing magic mud. This class intentionally does not include
-        functionality for condensing modifications of different types into
-        a single net modifier, as this may result in incorrect properties of
-        a mud in case further modifiers to the same trait are added later."""
+    """A multi-trait modifier aggregates modifications to a given trait
+    from multiple sources, either as a hybrid mushroom or as the first
+    step in mixing magic mud. This class intentionally does not include
+    functionality for condensing modifications of different types into
+    a single net modifier, as this may result in incorrect properties of
+    a mud in case further modifiers to the same trait are added later."""
     def __init__(self, single_trait_modifiers=[]):
         self.modifiers = {
             'A':[],
@@ -71,7 +79,7 @@ class MultiTraitModifier:
     def combine(self, other_multi_trait_modifiers):
         for mod in other_multi_trait_modifiers:
             for code in self.modifiers.keys():
-                self.modifiers[code] += other_multi_trait_modifiers.modifiers[code]
+                self.modifiers[code] += mod.modifiers[code]
 
 class Mud:
     """Mud reflects the combined effects of the mushrooms used to make it. It
@@ -79,7 +87,12 @@ class Mud:
     contributing mushrooms and uses the mix_mud method to determine the
     resulting effects (called during __init__). The apply_to_frog method may
     be called to do an in-place modification of the genetics of a frog. The
-    frog (tadpoles) should be passed as the sole argument to apply_to_frog."""
+    frog (tadpoles) should be passed as the sole argument to apply_to_frog.
+    The apply_to_genomes method does the same for a whole population at once,
+    given as an (N, 7) array of trait values in ANOURES order. Both work by
+    indexing into the table from compile, since a mixed mud acts on each
+    trait independently; tables of several muds can be composed to get the
+    effect of several generations without touching any frog."""
     def __init__(self, mushrooms):
         self.aggregate_modifier = MultiTraitModifier()
         self.aggregate_modifier.combine([m.modifier for m in mushrooms])
@@ -110,7 +123,7 @@ class Mud:
                     if suppress:
                         continue
                     elif len(min_maxes) > 0:
-                        single_trait_modifiers += min_maxes[0]
+                        single_trait_modifiers.append(min_maxes[0])
                         # Caution: undefined behavior if there is both a min and a max
                         # for the same trait. Here we just accept the first one found.
                     elif len(additives) > 0:
@@ -124,16 +137,120 @@ class Mud:
                         single_trait_modifiers.append(
                             SingleTraitModifier(code, final_additive, operation="add"))
         self.mixed_modifier = MultiTraitModifier(single_trait_modifiers)
+        self.table = None
+    def compile(self):
+        """Returns the (7, 7) uint8 table of the mud's effect, where entry
+        [t, v - 1] is the new value of trait t (in ANOURES order) for a frog
+        with value v. The table is computed once and kept read-only, and all
+        application of the mud is done by indexing into it."""
+        if self.table is None:
+            table = identity_table.copy()
+            for i, code in enumerate("ANOURES"):
+                match len(mods := self.mixed_modifier.modifiers[code]):
+                    case 0:
+                        continue
+                    case 1:
+                        mod = mods[0]
+                        table[i] = [adjusted_value(v, mod.operation, mod.scalar) for v in range(1, 8)]
+                    case _:
+                        assert False, "mud not fully mixed at time of compiling"
+            table.flags.writeable = False
+            self.table = table
+        return self.table
     def apply_to_frog(self, frog):
-        for code in "ANOURES":
-            match len(mod := self.mixed_modifier[code]):
-                case 0:
-                    continue
-                case 1:
-                    frog_trait = frog.genetics.traits[code]
-                    frog_trait.adjust(mod.operation, mod.scalar)
-                case _:
-                    assert False, "mud not fully mixed at time of applying to frog"
+        table = self.compile()
+        for i, code in enumerate("ANOURES"):
+            frog.genetics[code] = int(table[i, frog.genetics[code] - 1])
+    def freeze(self):
+        """Makes the modifiers of this mud read-only, so that one mixed mud
+        can be safely shared, for instance by MudCache."""
+        for modifier in (self.aggregate_modifier, self.mixed_modifier):
+            modifier.modifiers = MappingProxyType(
+                {code: tuple(mods) for code, mods in modifier.modifiers.items()})
+        self.compile()
+        return self
+    def apply_to_genomes(self, genomes, out=None):
+        """Applies the mud to every row of an (N, 7) uint8 array of trait
+        values in one vectorized pass, with the same semantics and clamping
+        as GeneticTrait.adjust. The result is written to out if given (which
+        may be genomes itself, for an in-place update) and returned."""
+        return apply_table(self.compile(), genomes, out)
+
+def apply_table(table, genomes, out=None):
+    """Applies a compiled (7, 7) mud table to an (N, 7) array of trait
+    values, writing to out if given (which may be genomes itself)."""
+    genomes = np.asarray(genomes)
+    assert genomes.ndim == 2 and genomes.shape[1] == 7, "genomes must be an (N, 7) array"
+    if out is None:
+        out = np.empty(genomes.shape, dtype=np.uint8)
+    for i in range(7):
+        out[:, i] = table[i][genomes[:, i] - 1]
+    return out
+
+def compose_tables(*tables):
+    """Composes compiled mud tables in the order the muds are applied (the
+    first table acts on the first generation), giving one (7, 7) table with
+    the effect of the whole sequence. Stacks of tables with shape (..., 7, 7)
+    are composed elementwise."""
+    assert len(tables) > 0, "no tables to compose"
+    result = np.asarray(tables[0])
+    for table in tables[1:]:
+        table = np.asarray(table)
+        result = np.take_along_axis(table, result.astype(np.intp) - 1, axis=-1)
+    return result
+
+def compose_muds(muds):
+    """Returns the compiled table of a sequence of muds applied over
+    successive generations."""
+    return compose_tables(*[mud.compile() for mud in muds])
+
+class MudCache:
+    """A bounded least-recently-used cache of mixed muds, keyed by the
+    multiset of mushroom names that went into them. The mud for a given
+    multiset is mixed only once (from the mushrooms sorted by name, so that
+    the order of ingredients never matters), frozen, and then shared by every
+    caller until it is evicted. Hit and miss counts are kept for tuning the
+    size of the cache."""
+    def __init__(self, maxsize=4096):
+        assert maxsize > 0, "cache size must be positive"
+        self.maxsize = maxsize
+        self.muds = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    def key(self, mushrooms):
+        return tuple(sorted(mushroom.name for mushroom in mushrooms))
+    def get(self, mushrooms):
+        key = self.key(mushrooms)
+        mud = self.muds.get(key)
+        if mud is not None:
+            self.hits += 1
+            self.muds.move_to_end(key)
+            return mud
+        self.misses += 1
+        mud = Mud(sorted(mushrooms, key=lambda mushroom: mushroom.name)).freeze()
+        self.muds[key] = mud
+        if len(self.muds) > self.maxsize:
+            self.muds.popitem(last=False)
+        return mud
+    def resize(self, maxsize):
+        assert maxsize > 0, "cache size must be positive"
+        self.maxsize = maxsize
+        while len(self.muds) > self.maxsize:
+            self.muds.popitem(last=False)
+    def clear(self):
+        self.muds.clear()
+        self.hits = 0
+        self.misses = 0
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self.muds), "maxsize": self.maxsize}
+
+mud_cache = MudCache()
+
+def mix_mushrooms(mushrooms):
+    """Returns the shared, read-only mud mixed from the given mushrooms,
+    using the module-level mud_cache."""
+    return mud_cache.get(mushrooms)
 
 class Mushroom:
     """All information about a species of mushroom, including its growing
@@ -149,6 +266,11 @@ class Mushroom:
         self.weather = weather
         self.parse_effects(effects)
         self.check_valid()
+    @property
+    def growing_conditions(self):
+        """The list of (domain, tile type, temperature, humidity, weather)
+        tuples under which the mushroom grows."""
+        return [(self.domain, self.tile_type, self.temperature, self.humidity, self.weather)]
     def check_valid(self):
         assert self.domain in all_domains
         assert self.tile_type in all_tile_types
@@ -178,3 +300,64 @@ class Mushroom:
             modifier = SingleTraitModifier(trait_code, scalar=scalar, operation=operation)
             effects.append(modifier)
         self.modifier = MultiTraitModifier(effects)
+
+class HybridMushroom(Mushroom):
+    """A hybrid grown from the spore prints of two mushrooms (either of which
+    may itself be a hybrid). Its modifier aggregates every modifier of both
+    parents without simplification, as described for MultiTraitModifier, and
+    it grows under the conditions of either parent, as listed by
+    growing_conditions. Its domain, tile_type, temperature, humidity and
+    weather are strings, as for any Mushroom, when all of its growing
+    conditions agree on them, and raise a ValueError otherwise. See
+    hybrids.py for enumerating the hybrids of a collection."""
+    def __init__(self, first_parent, second_parent, name=None):
+        self.parents = (first_parent, second_parent)
+        self.name = name or " x ".join(
+            f"({parent.name})" if isinstance(parent, HybridMushroom) else parent.name
+            for parent in self.parents)
+        self.modifier = MultiTraitModifier()
+        self.modifier.combine([parent.modifier for parent in self.parents])
+        self.check_valid()
+    @property
+    def growing_conditions(self):
+        conditions = []
+        for parent in self.parents:
+            for condition in parent.growing_conditions:
+                if condition not in conditions:
+                    conditions.append(condition)
+        return conditions
+    def _condition_value(self, i, field):
+        # A hybrid has a single value for a field only when every one of its
+        # growing conditions agrees on it.
+        values = set(condition[i] for condition in self.growing_conditions)
+        if len(values) > 1:
+            raise ValueError(f"hybrid {self.name} grows with several values of {field} "
+                             f"({', '.join(sorted(values))}); use growing_conditions instead")
+        return values.pop()
+    @property
+    def domain(self):
+        return self._condition_value(0, "domain")
+    @property
+    def tile_type(self):
+        return self._condition_value(1, "tile_type")
+    @property
+    def temperature(self):
+        return self._condition_value(2, "temperature")
+    @property
+    def humidity(self):
+        return self._condition_value(3, "humidity")
+    @property
+    def weather(self):
+        return self._condition_value(4, "weather")
+    @property
+    def species(self):
+        """The non-hybrid mushrooms this hybrid descends from, in order, with
+        repeats if a species appears in several branches."""
+        species = []
+        for parent in self.parents:
+            species += parent.species if isinstance(parent, HybridMushroom) else [parent]
+        return species
+    def check_valid(self):
+        for parent in self.parents:
+            assert isinstance(parent, Mushroom), "hybrid parents must be mushrooms"
+            parent.check_valid()
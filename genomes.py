@@ -0,0 +1,31 @@
+# Helpers for working with many frog genomes at once as NumPy arrays. A
+# population is an (N, 7) uint8 array of trait values in ANOURES order, and
+# each row can also be packed into a single base-7 integer as described in
+# frog.py. The whole genome space holds 7**7 = 823,543 distinct genomes.
+
+import numpy as np
+
+from frog import n_genomes, place_values, pack_genetics
+
+place_array = np.array(place_values, dtype=np.int64)
+
+def genomes_from_codes(codes):
+    """Builds an (N, 7) uint8 array from seven-digit genetic code strings."""
+    return unpack_genomes([pack_genetics(str(code)) for code in codes])
+
+def pack_genomes(genomes):
+    """Packs an (N, 7) array of trait values into N base-7 integers."""
+    genomes = np.asarray(genomes)
+    assert genomes.ndim == 2 and genomes.shape[1] == 7, "genomes must be an (N, 7) array"
+    return (genomes.astype(np.int64) - 1) @ place_array
+
+def unpack_genomes(packed):
+    """Unpacks N base-7 integers into an (N, 7) uint8 array of trait values."""
+    packed = np.asarray(packed, dtype=np.int64).reshape(-1)
+    assert packed.size == 0 or (packed.min() >= 0 and packed.max() < n_genomes), "invalid packed genetic code"
+    return (packed[:, None] // place_array % 7 + 1).astype(np.uint8)
+
+def all_genomes():
+    """Returns every possible genome as an (823543, 7) uint8 array, ordered
+    so that row i is the genome with packed code i."""
+    return unpack_genomes(np.arange(n_genomes))
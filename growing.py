@@ -0,0 +1,71 @@
+# Index of where mushrooms can be grown. Every mushroom grows under one set
+# of conditions: a domain, a tile type, a temperature, a humidity and a
+# weather state (hybrids from spore prints may grow under either parent's
+# conditions). Temperature and humidity on a tile follow from the time of
+# day, the weather, the tile type, any machines and any compost, as
+# described in environment.py, so the question of what can be grown on a
+# tile right now is a derivation followed by a single dict lookup.
+
+from environment import derive_conditions
+from mud_effects import all_mushrooms
+
+condition_fields = ("domain", "tile_type", "temperature", "humidity", "weather")
+
+class GrowingIndex:
+    """Index from growing conditions to mushrooms (all of fungi_collection
+    by default). Full (domain, tile type, temperature, humidity, weather)
+    tuples are looked up directly, and partial queries on any subset of
+    those fields intersect per-field indexes of every (mushroom, conditions)
+    entry, so that a hybrid only matches when one of its sets of conditions
+    meets the whole query. Results keep the order in which the mushrooms
+    were given."""
+    def __init__(self, mushrooms=None):
+        self.mushrooms = all_mushrooms() if mushrooms is None else list(mushrooms)
+        self.by_conditions = {}
+        self.entries = []
+        self.by_field = {field: {} for field in condition_fields}
+        for i, mushroom in enumerate(self.mushrooms):
+            for conditions in mushroom.growing_conditions:
+                ids = self.by_conditions.setdefault(conditions, [])
+                if i in ids:
+                    continue
+                ids.append(i)
+                for field, value in zip(condition_fields, conditions):
+                    self.by_field[field].setdefault(value, set()).add(len(self.entries))
+                self.entries.append((i, conditions))
+    def lookup(self, domain, tile_type, temperature, humidity, weather):
+        """Returns the mushrooms growing under exactly these conditions."""
+        ids = self.by_conditions.get((domain, tile_type, temperature, humidity, weather), [])
+        return [self.mushrooms[i] for i in ids]
+    def query(self, **conditions):
+        """Returns the mushrooms matching a partial set of conditions, given
+        as keyword arguments named after condition_fields. Each value may be a
+        single value or a collection of acceptable values."""
+        entries = set(range(len(self.entries)))
+        for field, values in conditions.items():
+            assert field in condition_fields, f"invalid growing condition {field}"
+            if isinstance(values, str):
+                values = [values]
+            matching = set()
+            for value in values:
+                matching |= self.by_field[field].get(value, set())
+            entries &= matching
+        ids = set(self.entries[entry][0] for entry in entries)
+        return [self.mushrooms[i] for i in sorted(ids)]
+    def growable(self, domain, tile_type, time, weather, temperature_machine=0,
+                 humidity_machine=0, compost=None):
+        """Returns the mushrooms that can be grown on a tile of the given
+        domain and type at this time of day and weather, with the effect of
+        any machine and compost (see environment.derive_conditions)."""
+        temperature, humidity = derive_conditions(time, weather, tile_type,
+                                                  temperature_machine, humidity_machine, compost)
+        return self.lookup(domain, tile_type, temperature, humidity, weather)
+
+_growing_index = None
+
+def get_growing_index():
+    """Returns a shared GrowingIndex over fungi_collection."""
+    global _growing_index
+    if _growing_index is None:
+        _growing_index = GrowingIndex()
+    return _growing_index
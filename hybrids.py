@@ -0,0 +1,171 @@
+# Enumeration of the hybrid mushrooms that can be made from spore prints.
+# A hybrid of two mushrooms carries every modifier of both parents (see
+# HybridMushroom in fungi.py), and hybrids can themselves be hybridized, so
+# the number of hybrids grows quickly with depth. Most of them are redundant,
+# though, and only the first mushroom found with each effect (the
+# shallowest, and among those the first in collection order) is kept as an
+# ingredient. The growing conditions of every equivalent hybrid are kept
+# alongside, since any of them can stand in for the representative.
+
+# Two mushrooms are equivalent when they have the same effect in any mud,
+# alone or with other mushrooms. Mixing mud (see Mud.mix_mud) looks at each
+# trait separately, and on one trait a suppress cancels every other
+# modifier, a min or max overrides every add and mult, a lone modifier is
+# passed through, and two or more adds and mults only count through the sum
+# of the adds and the product of the mults. So the modifiers of a mushroom
+# on each trait are reduced to a canonical list with the same effect in any
+# mud: a single suppress; the distinct mins and maxes; a lone mult as it is
+# (as it multiplies the trait value when alone); or else an add of the sum
+# and a mult of the product, which is also what a lone add amounts to. The
+# signature of a mushroom is the sorted tuple of its canonical (trait,
+# operation, scalar) modifiers, and the signature of a hybrid is that of its
+# parents' canonical modifiers taken together.
+
+# Even deduplicated, the hybrids are far too many for planners at depth 2
+# (13,226 ingredients from 24 species), since a MudEffectTable mixes every
+# multiset of its ingredients: about n**3 / 6 muds for n ingredients at three
+# mushrooms per mud. Planners are therefore given a pruned and capped set
+# (see HybridEngine.planner_ingredients): every species, then the hybrids,
+# shallowest first, whose effect alone in a mud (its compiled table) is new,
+# up to planner_ingredient_limit ingredients in all. Unlike the signature,
+# the table alone does not show every difference a hybrid makes in a mixed
+# mud, so this pruning may drop a hybrid with effects no kept ingredient
+# has; and hybrids past the limit are left out whatever their effect. With
+# 64 ingredients, a MudEffectTable of up to three mushrooms per mud mixes
+# about 48,000 recipes, which takes a few seconds.
+
+from fungi import HybridMushroom, mix_mushrooms
+from mud_effects import all_mushrooms
+
+planner_ingredient_limit = 64
+
+def canonical_modifiers(code, modifiers):
+    """Reduces a list of (operation, scalar) modifiers on one trait to the
+    canonical list of (trait code, operation, scalar) described above."""
+    operations = set(operation for operation, _ in modifiers)
+    if "suppress" in operations:
+        return [(code, "suppress", 0)]
+    if "min" in operations or "max" in operations:
+        return [(code, operation, 0) for operation in sorted(operations & {"min", "max"})]
+    if len(modifiers) == 1 and modifiers[0][0] == "mult":
+        return [(code, *modifiers[0])]
+    total = 0
+    product = 1
+    for operation, scalar in modifiers:
+        if operation == "add":
+            total += scalar
+        else:
+            product *= scalar
+    return [(code, "add", total), (code, "mult", product)]
+
+def canonical_signature(modifiers):
+    """Returns the signature of a list of (trait code, operation, scalar)
+    modifiers."""
+    by_trait = {}
+    for code, operation, scalar in modifiers:
+        by_trait.setdefault(code, []).append((operation, scalar))
+    signature = []
+    for code, trait_modifiers in by_trait.items():
+        signature += canonical_modifiers(code, trait_modifiers)
+    return tuple(sorted(signature))
+
+def modifier_signature(mushroom):
+    """Returns the signature of a mushroom (or hybrid)."""
+    return canonical_signature([(mod.code, mod.operation, mod.scalar)
+                                for mods in mushroom.modifier.modifiers.values() for mod in mods])
+
+def merge_signatures(first, second):
+    return canonical_signature(first + second)
+
+class HybridEngine:
+    """Enumerates the hybrids of the given mushrooms (all of fungi_collection
+    by default) up to a depth of hybridization: depth 1 gives hybrids of two
+    species, depth 2 adds hybrids with a depth-1 hybrid as a parent, and so
+    on. Mushrooms with the same signature are deduplicated as described
+    above, including hybrids equivalent to a plain species, and a hybrid of
+    a mushroom with itself is not made. Hybrids with more than max_modifiers
+    canonical modifiers are skipped, if given."""
+    def __init__(self, mushrooms=None, depth=1, max_modifiers=None):
+        assert depth >= 0, "hybridization depth must not be negative"
+        self.species = all_mushrooms() if mushrooms is None else list(mushrooms)
+        self.depth = depth
+        self.max_modifiers = max_modifiers
+        self.by_signature = {}
+        self.signatures = {}
+        self.equivalents = {}
+        self.levels = [[]]
+        for mushroom in self.species:
+            self._add(modifier_signature(mushroom), mushroom, self.levels[0])
+        pool = list(self.levels[0])
+        for level in range(1, depth + 1):
+            self.levels.append([])
+            newest = self.levels[level - 1]
+            # Pair every kept mushroom with every mushroom of the previous
+            # level that comes after it, so that each pair is tried once.
+            start = len(pool) - len(newest)
+            for j, second in enumerate(newest, start):
+                for first in pool[:j]:
+                    signature = merge_signatures(self.signatures[first.name], self.signatures[second.name])
+                    if self.max_modifiers is not None and len(signature) > self.max_modifiers:
+                        continue
+                    if signature in self.by_signature:
+                        self.equivalents[signature].append((first, second))
+                        continue
+                    self._add(signature, HybridMushroom(first, second), self.levels[level])
+            pool += self.levels[level]
+            if not self.levels[level]:
+                break
+    def _add(self, signature, mushroom, level):
+        # Equivalent mushrooms are recorded by their parents (a species is
+        # its own single parent), without building the duplicate hybrids.
+        parents = mushroom.parents if isinstance(mushroom, HybridMushroom) else (mushroom,)
+        if signature in self.by_signature:
+            self.equivalents[signature].append(parents)
+            return
+        self.by_signature[signature] = mushroom
+        self.signatures[mushroom.name] = signature
+        self.equivalents[signature] = [parents]
+        level.append(mushroom)
+    @property
+    def hybrids(self):
+        """Every distinct hybrid found, shallowest first."""
+        return [mushroom for level in self.levels[1:] for mushroom in level]
+    def ingredients(self):
+        """Returns every distinct species and hybrid. At depth 2 and beyond
+        these are too many for a MudEffectTable; see planner_ingredients."""
+        return [mushroom for level in self.levels for mushroom in level]
+    def planner_ingredients(self, limit=planner_ingredient_limit):
+        """Returns at most limit ingredients, pruned by their effect alone in
+        a mud as described above, which can be passed as the mushrooms of a
+        MudEffectTable or any other planner."""
+        kept = []
+        tables = set()
+        for mushroom in self.ingredients():
+            if len(kept) >= limit:
+                break
+            table = mix_mushrooms([mushroom]).compile().tobytes()
+            if isinstance(mushroom, HybridMushroom) and table in tables:
+                continue
+            tables.add(table)
+            kept.append(mushroom)
+        return kept
+    def __len__(self):
+        return len(self.by_signature)
+    def __iter__(self):
+        return iter(self.ingredients())
+    def find(self, mushroom):
+        """Returns the kept mushroom with the same signature as the given
+        mushroom or hybrid, or None if none was found."""
+        return self.by_signature.get(modifier_signature(mushroom))
+    def signature(self, mushroom):
+        return self.signatures.get(mushroom.name) or modifier_signature(mushroom)
+    def growing_conditions(self, mushroom):
+        """Returns the growing conditions of every mushroom equivalent to the
+        given one, that is, everywhere its effect can be grown."""
+        conditions = []
+        for parents in self.equivalents.get(self.signature(mushroom), []):
+            for parent in parents:
+                for condition in parent.growing_conditions:
+                    if condition not in conditions:
+                        conditions.append(condition)
+        return conditions
@@ -0,0 +1,147 @@
+# Opt-in instrumentation of the hot paths of this library. When enabled, the
+# methods listed in instrumented_methods are replaced by wrappers that count
+# calls and accumulate the time spent in them (including time spent in any
+# instrumented methods they call), and the report also includes the hit and
+# miss counts of the mud cache. When disabled, the original methods are put
+# back, so instrumentation costs nothing at all unless it is switched on.
+
+# Usage:
+#
+#   import instrumentation
+#   with instrumentation.instrumented():
+#       planner.plan("Common Green", "Towering Prince")
+#   instrumentation.dump_json("profile.json")
+
+import functools
+import importlib
+import inspect
+import json
+import time
+
+# (module, class, method) triples wrapped when instrumentation is enabled.
+instrumented_methods = (
+    ("frog", "GeneticTrait", "adjust"),
+    ("frog", "PackedGeneticCode", "adjust"),
+    ("frog", "Frog", "__init__"),
+    ("frog", "FrogVariant", "__init__"),
+    ("fungi", "MultiTraitModifier", "combine"),
+    ("fungi", "Mud", "__init__"),
+    ("fungi", "Mud", "mix_mud"),
+    ("fungi", "Mud", "compile"),
+    ("fungi", "Mud", "apply_to_frog"),
+    ("fungi", "Mud", "apply_to_genomes"),
+    ("fungi", "Mushroom", "__init__"),
+    ("fungi", "Mushroom", "parse_effects"),
+    ("critters", "Critter", "__init__"),
+    ("flora", "Flower", "__init__"),
+    ("frog_index", "FrogIndex", "frog_ids"),
+    ("frog_index", "FrogIndex", "classify"),
+    ("breeding", "BreedingPlanner", "children"),
+    ("breeding", "BreedingPlanner", "node_children"),
+    ("breeding", "BreedingPlanner", "parents"),
+    ("breeding", "BreedingPlanner", "search"),
+    ("breeding", "BreedingPlanner", "bidirectional_search"),
+)
+
+_originals = {}
+_counters = {}
+
+def is_enabled():
+    return len(_originals) > 0
+
+def _wrap(name, func):
+    counter = _counters.setdefault(name, [0, 0.0])
+    if inspect.isgeneratorfunction(func):
+        # Time the whole iteration rather than the creation of the
+        # generator, counting one call per generator.
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            counter[0] += 1
+            generator = func(*args, **kwargs)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    # Time spent by the consumer is not counted.
+                    counter[1] += time.perf_counter() - start
+                yield item
+        return generator_wrapper
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += time.perf_counter() - start
+    return wrapper
+
+def enable(methods=instrumented_methods):
+    """Replaces the given methods with counting and timing wrappers. Modules
+    are imported as needed. Enabling twice has no further effect."""
+    for module_name, class_name, method_name in methods:
+        key = (module_name, class_name, method_name)
+        if key in _originals:
+            continue
+        cls = getattr(importlib.import_module(module_name), class_name)
+        # Only wrap methods defined on the class itself, so that a subclass
+        # does not end up wrapping its parent's wrapper.
+        original = vars(cls)[method_name]
+        _originals[key] = original
+        setattr(cls, method_name, _wrap(f"{class_name}.{method_name}", original))
+
+def disable():
+    """Restores every instrumented method. Counters are kept until reset."""
+    for (module_name, class_name, method_name), original in _originals.items():
+        cls = getattr(importlib.import_module(module_name), class_name)
+        setattr(cls, method_name, original)
+    _originals.clear()
+
+def reset():
+    """Zeroes every counter, including the mud cache statistics."""
+    for counter in _counters.values():
+        counter[0] = 0
+        counter[1] = 0.0
+    from fungi import mud_cache
+    mud_cache.hits = 0
+    mud_cache.misses = 0
+
+class instrumented:
+    """Context manager enabling instrumentation for the duration of a block,
+    optionally resetting the counters first."""
+    def __init__(self, reset_counters=True, methods=instrumented_methods):
+        self.reset_counters = reset_counters
+        self.methods = methods
+    def __enter__(self):
+        self.was_enabled = is_enabled()
+        if self.reset_counters:
+            reset()
+        enable(self.methods)
+        return self
+    def __exit__(self, *exc_info):
+        if not self.was_enabled:
+            disable()
+        return False
+
+def report():
+    """Returns the counters as a dict: for each instrumented method, its
+    number of calls and cumulative and mean time in seconds, along with the
+    statistics of the mud cache."""
+    from fungi import mud_cache
+    calls = {}
+    for name, (count, seconds) in sorted(_counters.items()):
+        calls[name] = {"calls": count, "seconds": seconds,
+                       "mean_seconds": seconds / count if count else 0.0}
+    return {"enabled": is_enabled(), "calls": calls, "caches": {"mud_cache": mud_cache.stats()}}
+
+def dump_json(path=None, indent=2):
+    """Writes the report to a file, or returns it as a JSON string if no
+    path is given."""
+    text = json.dumps(report(), indent=indent)
+    if path is None:
+        return text
+    with open(path, "w") as f:
+        f.write(text)
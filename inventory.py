@@ -0,0 +1,304 @@
+# Column-oriented storage for large numbers of frogs. Instead of one Frog
+# object per frog, an inventory keeps parallel NumPy arrays: the genome (one
+# column per trait), the packed genetic code, the species and variant ids
+# (from a FrogIndex, see frog_index.py) and the mask of flavors its tadpoles
+# need. Rows are kept dense: removing a frog moves the last row into its
+# place, so adding and removing frogs cost amortized O(1), with the arrays
+# doubling in capacity as needed. Frogs keep a stable id however their rows
+# move.
+
+# For queries on trait values, every (trait, value) pair has a bucket
+# listing the rows with that value, and each row remembers its position in
+# its seven buckets so that it can be removed from them in O(1). A query on
+# ranges of trait values starts from the trait whose matching buckets hold
+# the fewest rows, and checks the other conditions on those rows only, so
+# its cost depends on the number of candidates rather than the size of the
+# inventory.
+
+import random
+import re
+
+import numpy as np
+
+from critters import all_flavors
+from frog import trait_codes, trait_names
+from frog_index import get_frog_index
+from genomes import genomes_from_codes, pack_genomes
+
+flavor_order = sorted(all_flavors)
+trait_lookup = {**{code: code for code in trait_codes},
+                **{name.lower(): code for code, name in trait_names.items()}}
+
+def parse_conditions(expression):
+    """Parses conditions such as "Ribbit >= 6 and Umbrage <= 2" or
+    "Saturation == 7" into a dict from trait code to an inclusive (low, high)
+    range. Traits may be given by name or one-letter code, and the operators
+    are ==, !=, <, <=, > and >= (!= only at either end of the range)."""
+    ranges = {}
+    for term in re.split(r"\s+and\s+|\s*,\s*", expression.strip()):
+        match = re.fullmatch(r"(\w+)\s*(==|=|!=|<=|>=|<|>)\s*(\d)", term.strip())
+        assert match, f"invalid condition {term}"
+        trait, operator, value = match.groups()
+        code = trait_lookup.get(trait) or trait_lookup.get(trait.lower())
+        assert code is not None, f"unknown trait {trait}"
+        value = int(value)
+        low, high = ranges.get(code, (1, 7))
+        match operator:
+            case "==" | "=":
+                low, high = max(low, value), min(high, value)
+            case "<=":
+                high = min(high, value)
+            case "<":
+                high = min(high, value - 1)
+            case ">=":
+                low = max(low, value)
+            case ">":
+                low = max(low, value + 1)
+            case "!=":
+                assert value in (low, high), f"{term} would split the range of {trait}"
+                low, high = (low + 1, high) if value == low else (low, high - 1)
+        ranges[code] = (low, high)
+    return ranges
+
+class FrogInventory:
+    """A growable column store of frogs, classified with a FrogIndex (the
+    shared one by default). Frogs are added in bulk with add or add_frogs,
+    which return their ids, removed by id with remove, and found with query
+    or where. Rows 0 to len - 1 of the arrays hold the current frogs, in no
+    particular order."""
+    def __init__(self, capacity=1024, frog_index=None):
+        self.frog_index = frog_index or get_frog_index()
+        self.size = 0
+        self.next_id = 0
+        self._allocate(max(1, capacity))
+        self.id_rows = np.full(max(1, capacity), -1, dtype=np.int64)
+        self.buckets = [np.empty(max(1, capacity // 7), dtype=np.int64) for _ in range(49)]
+        self.bucket_sizes = np.zeros((7, 7), dtype=np.int64)
+        # Flavor masks of every species, from its first frog.
+        frogs = self.frog_index.frogs
+        self.species_flavors = np.zeros(len(self.frog_index.species), dtype=np.uint8)
+        for i in reversed(range(len(frogs))):
+            self.species_flavors[self.frog_index.frog_species[i]] = self.flavor_mask(frogs[i].flavors)
+    def _allocate(self, capacity):
+        old = getattr(self, "genomes", None)
+        columns = {
+            "genomes": ((capacity, 7), np.uint8),
+            "packed": ((capacity,), np.int32),
+            "species": ((capacity,), np.int16),
+            "variants": ((capacity,), np.int16),
+            "flavors": ((capacity,), np.uint8),
+            "ids": ((capacity,), np.int64),
+            "bucket_positions": ((capacity, 7), np.int64),
+        }
+        for name, (shape, dtype) in columns.items():
+            array = np.empty(shape, dtype=dtype)
+            if old is not None:
+                array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        self.capacity = capacity
+    def flavor_mask(self, flavors):
+        mask = 0
+        for flavor in flavors:
+            assert flavor in flavor_order, f"invalid flavor {flavor}"
+            mask |= 1 << flavor_order.index(flavor)
+        return mask
+    def __len__(self):
+        return self.size
+    def __contains__(self, frog_id):
+        return 0 <= frog_id < self.next_id and self.id_rows[frog_id] >= 0
+    @property
+    def frog_ids(self):
+        return self.ids[:self.size]
+    def add(self, genomes, species=None, flavors=None):
+        """Adds frogs in bulk and returns their ids. Genomes are an (N, 7)
+        array of trait values or a list of genetic code strings. Frogs whose
+        genome matches a listed species or variant are classified as such;
+        the others get the given species (one name, or one per frog), if any.
+        Flavors default to those of the species, and may be given as one
+        list of flavors per frog."""
+        if len(genomes) > 0 and isinstance(genomes[0], str):
+            genomes = genomes_from_codes(genomes)
+        genomes = np.asarray(genomes, dtype=np.uint8).reshape(-1, 7)
+        n = len(genomes)
+        packed = pack_genomes(genomes)
+        variants = self.frog_index.frog_ids(packed)
+        species_ids = np.where(variants >= 0, self.frog_index.frog_species[variants], -1).astype(np.int16)
+        if species is not None:
+            names = [species] * n if isinstance(species, str) else list(species)
+            given = np.array([self.frog_index.species_id(name) if name else -1 for name in names], dtype=np.int16)
+            species_ids = np.where(species_ids >= 0, species_ids, given)
+        if flavors is None:
+            flavor_masks = np.where(species_ids >= 0, self.species_flavors[species_ids], 0)
+        else:
+            flavor_masks = [self.flavor_mask(frog_flavors) for frog_flavors in flavors]
+        while self.size + n > self.capacity:
+            self._allocate(self.capacity * 2)
+        while self.next_id + n > len(self.id_rows):
+            self.id_rows = np.concatenate([self.id_rows, np.full(len(self.id_rows), -1, dtype=np.int64)])
+        rows = np.arange(self.size, self.size + n)
+        ids = np.arange(self.next_id, self.next_id + n)
+        self.genomes[rows] = genomes
+        self.packed[rows] = packed
+        self.species[rows] = species_ids
+        self.variants[rows] = variants
+        self.flavors[rows] = flavor_masks
+        self.ids[rows] = ids
+        self.id_rows[ids] = rows
+        for t in range(7):
+            for v in range(7):
+                members = rows[genomes[:, t] == v + 1]
+                self._bucket_append(t, v, members)
+        self.size += n
+        self.next_id += n
+        return ids
+    def add_frogs(self, frogs):
+        """Adds Frog objects (their genetics, species and flavors) and
+        returns their ids."""
+        frogs = list(frogs)
+        return self.add([str(frog.genetics) for frog in frogs],
+                        species=[frog.species for frog in frogs],
+                        flavors=[frog.flavors for frog in frogs])
+    def _bucket_append(self, t, v, members):
+        b = t * 7 + v
+        start = self.bucket_sizes[t, v]
+        end = start + len(members)
+        if end > len(self.buckets[b]):
+            grown = np.empty(max(end, 2 * len(self.buckets[b])), dtype=np.int64)
+            grown[:start] = self.buckets[b][:start]
+            self.buckets[b] = grown
+        self.buckets[b][start:end] = members
+        self.bucket_positions[members, t] = np.arange(start, end)
+        self.bucket_sizes[t, v] = end
+    def remove(self, frog_ids):
+        """Removes frogs by id, each in O(1)."""
+        for frog_id in np.atleast_1d(frog_ids):
+            assert frog_id in self, f"no frog with id {frog_id}"
+            self._remove_row(int(self.id_rows[frog_id]))
+    def _remove_row(self, row):
+        # Take the row out of its buckets, filling each gap with the last
+        # member of the bucket.
+        for t in range(7):
+            v = int(self.genomes[row, t]) - 1
+            b = t * 7 + v
+            position = self.bucket_positions[row, t]
+            last_member = self.buckets[b][self.bucket_sizes[t, v] - 1]
+            self.buckets[b][position] = last_member
+            self.bucket_positions[last_member, t] = position
+            self.bucket_sizes[t, v] -= 1
+        self.id_rows[self.ids[row]] = -1
+        # Then move the last row into its place.
+        last = self.size - 1
+        if row != last:
+            for name in ("genomes", "packed", "species", "variants", "flavors", "ids", "bucket_positions"):
+                column = getattr(self, name)
+                column[row] = column[last]
+            for t in range(7):
+                self.buckets[t * 7 + int(self.genomes[row, t]) - 1][self.bucket_positions[row, t]] = row
+            self.id_rows[self.ids[row]] = row
+        self.size -= 1
+    def rows(self, frog_ids):
+        return self.id_rows[np.asarray(frog_ids, dtype=np.int64)]
+    def genetics(self, frog_id):
+        return "".join(str(v) for v in self.genomes[self.id_rows[frog_id]])
+    def record(self, frog_id):
+        """Returns a dict describing one frog."""
+        row = self.id_rows[frog_id]
+        variant = self.variants[row]
+        species = self.species[row]
+        return {
+            "id": int(frog_id),
+            "genetics": self.genetics(frog_id),
+            "species": self.frog_index.species[species] if species >= 0 else None,
+            "variant": self.frog_index.frogs[variant].variant if variant >= 0 else None,
+            "flavors": [flavor for i, flavor in enumerate(flavor_order) if self.flavors[row] >> i & 1],
+        }
+    def query(self, species=None, variant=None, **traits):
+        """Returns the sorted ids of the frogs matching every condition.
+        Traits are given as keyword arguments named by code or by name (in
+        any case), each a single value or an inclusive (low, high) range, as
+        in query(Ribbit=(6, 7), U=(1, 2)). Species and variant filter by
+        name."""
+        ranges = {}
+        for trait, value in traits.items():
+            code = trait_lookup.get(trait) or trait_lookup.get(trait.lower())
+            assert code is not None, f"unknown trait {trait}"
+            ranges[code] = (value, value) if isinstance(value, int) else tuple(value)
+        return self._query(ranges, species, variant)
+    def where(self, expression, species=None, variant=None):
+        """Returns the sorted ids of the frogs matching conditions such as
+        "Ribbit >= 6 and Umbrage <= 2" (see parse_conditions)."""
+        return self._query(parse_conditions(expression), species, variant)
+    def count(self, expression=None, **traits):
+        if expression is not None:
+            return len(self.where(expression))
+        return len(self.query(**traits))
+    def _candidates(self, t, low, high):
+        return np.concatenate([self.buckets[t * 7 + v][:self.bucket_sizes[t, v]] for v in range(low - 1, high)])
+    def _query(self, ranges, species=None, variant=None):
+        ranges = {trait_codes.index(code): (max(1, low), min(7, high)) for code, (low, high) in ranges.items()}
+        if any(low > high for low, high in ranges.values()):
+            return np.empty(0, dtype=np.int64)
+        if ranges:
+            # Start from the most selective trait.
+            sizes = {t: self.bucket_sizes[t, low - 1:high].sum() for t, (low, high) in ranges.items()}
+            first = min(sizes, key=sizes.get)
+            rows = self._candidates(first, *ranges[first])
+            for t, (low, high) in ranges.items():
+                if t != first and len(rows) > 0:
+                    values = self.genomes[rows, t]
+                    rows = rows[(values >= low) & (values <= high)]
+        else:
+            rows = np.arange(self.size)
+        if species is not None:
+            rows = rows[self.species[rows] == self.frog_index.species_id(species)]
+        if variant is not None:
+            variant_ids = [i for i, frog in enumerate(self.frog_index.frogs) if frog.variant == variant]
+            rows = rows[np.isin(self.variants[rows], variant_ids)]
+        return np.sort(self.ids[rows])
+
+def check_inventory_queries(seed=0, quick=False):
+    """Adds random frogs to an inventory in batches, removes random ones
+    between batches, and checks random range queries (through query and
+    where in turn) against a scan of the frogs that should remain. Returns
+    the number of queries checked."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    inventory = FrogInventory(capacity=16)
+    kept = {}
+    queries = 0
+    for _ in range(5 if quick else 20):
+        genomes = np_rng.integers(1, 8, size=(rng.randint(1, 2000), 7), dtype=np.uint8)
+        kept.update(zip(inventory.add(genomes).tolist(), genomes))
+        removed = rng.sample(sorted(kept), rng.randint(0, len(kept) // 2))
+        inventory.remove(removed)
+        for frog_id in removed:
+            del kept[frog_id]
+        assert len(inventory) == len(kept), f"inventory holds {len(inventory)} frogs, expected {len(kept)}"
+        ids = np.array(sorted(kept), dtype=np.int64)
+        genomes = np.array([kept[frog_id] for frog_id in ids]).reshape(-1, 7)
+        for _ in range(10):
+            ranges = {}
+            for t in rng.sample(range(7), rng.randint(1, 3)):
+                low = rng.randint(1, 7)
+                ranges[trait_codes[t]] = (low, rng.randint(low, 7))
+            expected = np.ones(len(ids), dtype=bool)
+            for code, (low, high) in ranges.items():
+                values = genomes[:, trait_codes.index(code)]
+                expected &= (values >= low) & (values <= high)
+            if queries % 2:
+                found = inventory.query(**ranges)
+            else:
+                found = inventory.where(" and ".join(f"{code} >= {low} and {code} <= {high}"
+                                                     for code, (low, high) in ranges.items()))
+            assert np.array_equal(found, ids[expected]), \
+                f"query {ranges} found {len(found)} frogs, expected {expected.sum()}"
+            queries += 1
+    return queries
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check inventory queries against a scan of every frog.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="check fewer batches of frogs")
+    args = parser.parse_args()
+    print(f"{check_inventory_queries(args.seed, args.quick)} queries checked")
@@ -0,0 +1,244 @@
+# Exact outcome distributions of mud sequences that may fail. A batch of mud
+# takes effect on a tadpole with some probability and otherwise does
+# nothing, so over a sequence of muds one frog's genome follows a Markov
+# chain on the genome space (7**7 states, see frog.py) rather than a single
+# path. Each step of the chain is a sparse transition matrix with at most
+# two entries per row: from genome x to the genome the mud turns it into,
+# with the mud's success probability, and from x back to itself with the
+# rest. The matrices are kept as the mud's successor array over the whole
+# genome space plus that probability, and are only expanded into coordinate
+# (COO) form on request.
+
+# Distributions are propagated in two ways. A MarkovDistribution holds, for a
+# batch of starting frogs, every (start, genome, species) triple of nonzero
+# probability as coordinate arrays: each step moves or keeps every entry,
+# and entries that land on the same triple are merged with np.unique and
+# np.bincount, so the cost depends on the size of the support (at most
+# doubling per step) and never on the number of sample paths. A genome that
+# matches no listed frog keeps its previous species, as in the game, which
+# is why the species is part of the state. Dense distributions over the
+# whole genome space, and the probability of reaching a target species,
+# work on full arrays instead: the latter by backward value iteration over
+# every genome at once, so that it can be read off for any batch of starts.
+
+import random
+
+import numpy as np
+
+from breeding import BreedingPlanner
+from frog import n_genomes, pack_genetics, place_values
+from frog_index import get_frog_index
+from fungi import apply_table
+from genomes import pack_genomes, unpack_genomes
+from population import mud_table
+
+def successor_codes(table):
+    """Returns the packed code each genome turns into under a compiled mud
+    table, as an int32 array over the whole genome space."""
+    table = np.asarray(table, dtype=np.int64)
+    contributions = (table - 1) * np.array(place_values, dtype=np.int64)[:, None]
+    # Genomes are numbered with trait A the most significant digit, so the
+    # outer sum of the per-trait contributions lists them in packed order.
+    codes = contributions[0]
+    for t in range(1, 7):
+        codes = np.add.outer(codes, contributions[t])
+    return codes.reshape(-1).astype(np.int32)
+
+class MarkovStep:
+    """One generation of the chain: a mud (anything accepted by
+    population.mud_table) that takes effect with probability success."""
+    def __init__(self, mud, success=1.0):
+        assert 0 <= success <= 1, "success probability must be between 0 and 1"
+        self.table = mud_table(mud)
+        self.success = success
+        self.successors = successor_codes(self.table) if self.table is not None \
+            else np.arange(n_genomes, dtype=np.int32)
+    def transition_matrix(self):
+        """Returns the sparse transition matrix as COO arrays (rows,
+        columns, probabilities), one entry per nonzero probability."""
+        states = np.arange(n_genomes, dtype=np.int32)
+        moved = self.successors != states
+        rows = np.concatenate([states, states[moved]])
+        columns = np.concatenate([np.where(moved, states, self.successors), self.successors[moved]])
+        probabilities = np.concatenate([np.where(moved, 1 - self.success, 1.0),
+                                        np.full(moved.sum(), self.success)])
+        keep = probabilities > 0
+        return rows[keep], columns[keep], probabilities[keep]
+    def propagate(self, probabilities):
+        """Returns the dense distribution over genomes after this step,
+        given the one before it (an array over the whole genome space)."""
+        moved = np.bincount(self.successors, weights=probabilities, minlength=n_genomes)
+        return (1 - self.success) * probabilities + self.success * moved
+
+class MarkovDistribution:
+    """The exact joint distribution of genome and species of each frog in a
+    batch, as coordinate arrays of equal length: starts (the index of the
+    frog in the batch), codes (packed genomes), species (ids from the
+    FrogIndex, -1 for unknown) and probabilities. Each start's entries sum
+    to 1, and no (start, code, species) triple appears twice."""
+    def __init__(self, n_starts, starts, codes, species, probabilities, frog_index):
+        self.n_starts = n_starts
+        self.starts = starts
+        self.codes = codes
+        self.species = species
+        self.probabilities = probabilities
+        self.frog_index = frog_index
+    def __len__(self):
+        return len(self.codes)
+    def step(self, step):
+        """Returns the distribution after one MarkovStep: every entry both
+        moves to its successor (if the mud works) and stays (if it fails),
+        and the results are merged."""
+        successors = step.successors[self.codes]
+        lookup = self.frog_index.species_ids(successors)
+        return self._merged(np.concatenate([self.starts, self.starts]),
+                            np.concatenate([successors, self.codes]),
+                            np.concatenate([np.where(lookup >= 0, lookup, self.species), self.species]),
+                            np.concatenate([self.probabilities * step.success,
+                                            self.probabilities * (1 - step.success)]))
+    def _merged(self, starts, codes, species, probabilities):
+        keep = probabilities > 0
+        starts, codes, species, probabilities = starts[keep], codes[keep], species[keep], probabilities[keep]
+        n_species = len(self.frog_index.species) + 1
+        keys = (starts.astype(np.int64) * n_genomes + codes) * n_species + species + 1
+        unique, inverse = np.unique(keys, return_inverse=True)
+        merged = np.bincount(inverse, weights=probabilities, minlength=len(unique))
+        return MarkovDistribution(self.n_starts, unique // n_species // n_genomes,
+                                  (unique // n_species % n_genomes).astype(np.int32),
+                                  (unique % n_species - 1).astype(np.int16), merged, self.frog_index)
+    def species_probabilities(self):
+        """Returns an (n_starts, n_species + 1) array of the probability of
+        each species, the last column being unknown species."""
+        n_species = len(self.frog_index.species)
+        columns = np.where(self.species >= 0, self.species, n_species)
+        result = np.zeros((self.n_starts, n_species + 1))
+        np.add.at(result, (self.starts, columns), self.probabilities)
+        return result
+    def genome_probabilities(self, start):
+        """Returns a dict from packed code to probability for one start."""
+        rows = self.starts == start
+        codes, inverse = np.unique(self.codes[rows], return_inverse=True)
+        return dict(zip(codes.tolist(), np.bincount(inverse, weights=self.probabilities[rows]).tolist()))
+    def dense(self):
+        """Returns the distribution over genomes of the whole batch, each
+        start weighted equally, as an array over the whole genome space."""
+        return np.bincount(self.codes, weights=self.probabilities, minlength=n_genomes) / self.n_starts
+
+class MarkovChain:
+    """A sequence of muds, each taking effect with its own probability,
+    applied over successive generations. Steps are given as muds (which then
+    succeed with probability success) or as (mud, success) pairs, told
+    apart by success being a number; a mud of None does nothing."""
+    def __init__(self, steps, success=1.0, frog_index=None):
+        self.frog_index = frog_index or get_frog_index()
+        self.steps = []
+        for step in steps:
+            # A pair ends in a probability; a recipe of two mushrooms does not.
+            if isinstance(step, tuple) and len(step) == 2 and isinstance(step[1], (int, float, np.number)):
+                self.steps.append(MarkovStep(*step))
+            else:
+                self.steps.append(MarkovStep(step, success))
+    def __len__(self):
+        return len(self.steps)
+    def start_distribution(self, starts, species=None):
+        """Returns the MarkovDistribution of a batch of starting frogs, given
+        as genetic code strings or packed codes. Each frog's species is the
+        one matching its code unless species (one name per start, or one
+        name for all) is given for those matching no listed frog."""
+        codes = np.array([int(start) if isinstance(start, (int, np.integer)) else pack_genetics(str(start))
+                          for start in starts], dtype=np.int32)
+        species_ids = self.frog_index.species_ids(codes).astype(np.int16)
+        if species is not None:
+            names = [species] * len(codes) if isinstance(species, str) else list(species)
+            given = np.array([self.frog_index.species_id(name) if name else -1 for name in names], dtype=np.int16)
+            species_ids = np.where(species_ids >= 0, species_ids, given)
+        return MarkovDistribution(len(codes), np.arange(len(codes)), codes, species_ids,
+                                  np.ones(len(codes)), self.frog_index)
+    def distribution(self, starts, species=None, generations=None):
+        """Returns the MarkovDistribution after the first generations steps
+        (all of them by default) from a batch of starting frogs."""
+        distribution = self.start_distribution(starts, species)
+        for step in self.steps[:generations]:
+            distribution = distribution.step(step)
+        return distribution
+    def dense_distribution(self, probabilities, generations=None):
+        """Propagates a distribution over the whole genome space (an array of
+        probabilities, or weights, over packed codes) through the steps."""
+        probabilities = np.asarray(probabilities, dtype=float)
+        assert probabilities.shape == (n_genomes,), "dense distributions cover the whole genome space"
+        for step in self.steps[:generations]:
+            probabilities = step.propagate(probabilities)
+        return probabilities
+    def reach_probabilities(self, target, generations=None):
+        """Returns, for every genome, the probability of reaching the target
+        species (the code of any of its variants) within the first
+        generations steps starting from that genome, by backward value
+        iteration over the whole genome space."""
+        steps = self.steps[:generations]
+        reached = np.zeros(n_genomes, dtype=bool)
+        reached[self.frog_index.codes_for_species(target)] = True
+        values = reached.astype(float)
+        for step in reversed(steps):
+            values = step.success * values[step.successors] + (1 - step.success) * values
+            values[reached] = 1.0
+        return values
+    def reach_probability(self, starts, target, species=None, generations=None):
+        """Returns the probability of each starting frog (as for
+        start_distribution) being of the target species at some generation
+        up to generations. A frog only changes species when its genome
+        matches a listed frog, so this is the probability of its genome
+        reaching a code of the target species, or 1 if it starts as one."""
+        start = self.start_distribution(starts, species)
+        values = self.reach_probabilities(target, generations)[start.codes]
+        return np.where(start.species == self.frog_index.species_id(target), 1.0, values)
+
+def check_markov_chain(seed=0, quick=False):
+    """Takes breeding routes between random pairs of species, gives each mud
+    of a route a random success probability, and checks the exact species
+    distribution after the chain and the probability of reaching the target
+    species, from every variant of the starting species, against simulating
+    each of them many times. Returns the number of chains checked."""
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    planner = BreedingPlanner()
+    index = planner.frog_index
+    samples = 2000 if quick else 20000
+    chains = 0
+    while chains < (4 if quick else 8):
+        start, target = rng.sample(index.species, 2)
+        route = planner.plan(start, target, max_generations=3)
+        if not route:
+            continue
+        chain = MarkovChain([(list(step.recipe), rng.uniform(0.3, 0.9)) for step in route], frog_index=index)
+        starts = index.codes_for_species(start).tolist()
+        probabilities = chain.distribution(starts).species_probabilities()
+        reach = chain.reach_probability(starts, target)
+        for i, code in enumerate(starts):
+            genomes = unpack_genomes(np.full(samples, code))
+            species = index.species_ids(np.full(samples, code))
+            reached = species == index.species_id(target)
+            for step in chain.steps:
+                worked = np.flatnonzero(np_rng.random(samples) < step.success)
+                genomes[worked] = apply_table(step.table, genomes[worked])
+                matched = index.species_ids(pack_genomes(genomes))
+                species = np.where(matched >= 0, matched, species)
+                reached |= species == index.species_id(target)
+            simulated = np.bincount(np.where(species >= 0, species, len(index.species)),
+                                    minlength=len(index.species) + 1) / samples
+            for exact, estimate, what in [*zip(probabilities[i], simulated, index.species + ["unknown"]),
+                                          (reach[i], reached.mean(), f"reaching {target}")]:
+                # Exact probabilities may stray outside [0, 1] by rounding.
+                variance = max(0.0, exact * (1 - exact))
+                tolerance = 5 * np.sqrt(variance / samples) + 1 / samples
+                assert abs(exact - estimate) <= tolerance, \
+                    f"probability of {what} from {code} is {exact:.4f}, simulated {estimate:.4f}"
+        chains += 1
+    return chains
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check Markov chain distributions against simulation.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="check fewer chains with fewer samples")
+    args = parser.parse_args()
+    print(f"{check_markov_chain(args.seed, args.quick)} chains checked")
@@ -0,0 +1,109 @@
+# Deduplicated table of the net effects of magic mud. Many different
+# combinations of mushrooms mix to the same net effect under Mud.mix_mud, for
+# instance because a suppressed trait contributes nothing, or because two
+# additive effects cancel out, or because clamping to 1-7 makes different
+# scalars equivalent. Since a mixed mud acts on each trait independently, its
+# complete effect is the 7x7 table of new trait values for every old value of
+# every trait (see Mud.compile), and two muds with the same table are
+# interchangeable for any frog. This table is used as the canonical
+# signature of a mud here, and searches or batch applications can iterate
+# over the distinct effects rather than every recipe.
+
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+import fungi_collection
+from fungi import identity_table, mix_mushrooms
+
+def all_mushrooms():
+    """Returns every mushroom in fungi_collection, in the order defined."""
+    return list(fungi_collection.catalog.values())
+
+class MudEffect:
+    """One distinct net effect of mud, with the cheapest recipes (tuples of
+    mushrooms) found to produce it and their cost."""
+    def __init__(self, table, recipes, cost):
+        self.table = table
+        self.recipes = recipes
+        self.cost = cost
+    @property
+    def recipe(self):
+        return self.recipes[0]
+    @property
+    def signature(self):
+        return self.table.tobytes()
+    def is_identity(self):
+        return bool((self.table == identity_table).all())
+    def __repr__(self):
+        names = " + ".join(mushroom.name for mushroom in self.recipe)
+        return f"MudEffect({names}, {len(self.recipes)} recipes, cost {self.cost})"
+
+class MudEffectTable:
+    """Enumerates every multiset of the given mushrooms (all of
+    fungi_collection by default) up to max_mushrooms per mud, mixes each one
+    and collapses them into their distinct effects. For each effect, the
+    recipes of lowest cost are kept, up to max_recipes of them (all of them
+    if None). The cost of a recipe defaults to its number of mushrooms; any
+    function of the tuple of mushrooms may be given instead. Effects are
+    ordered by cost and then by the order in which they were found, so the
+    first effect with a given table is always the cheapest."""
+    def __init__(self, mushrooms=None, max_mushrooms=3, cost=None, max_recipes=None):
+        self.mushrooms = all_mushrooms() if mushrooms is None else list(mushrooms)
+        self.max_mushrooms = max_mushrooms
+        cost = cost or len
+        found = {}
+        for size in range(1, max_mushrooms + 1):
+            for recipe in combinations_with_replacement(self.mushrooms, size):
+                table = mix_mushrooms(recipe).compile()
+                recipe_cost = cost(recipe)
+                key = table.tobytes()
+                if key not in found or recipe_cost < found[key].cost:
+                    found[key] = MudEffect(table, [recipe], recipe_cost)
+                elif recipe_cost == found[key].cost:
+                    if max_recipes is None or len(found[key].recipes) < max_recipes:
+                        found[key].recipes.append(recipe)
+        self.effects = sorted(found.values(), key=lambda effect: effect.cost)
+        self.tables = np.array([effect.table for effect in self.effects], dtype=np.uint8).reshape(-1, 7, 7)
+        self.index = {effect.signature: i for i, effect in enumerate(self.effects)}
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Builds the table of fungi_collection from the arrays of a catalog
+        Snapshot (see snapshot.py) without mixing any mud. Only the default
+        cost is available, and only the first recipe of each effect, whose
+        table is a view of the snapshot."""
+        table = cls.__new__(cls)
+        table.mushrooms = all_mushrooms()
+        assert [mushroom.name for mushroom in table.mushrooms] == snapshot.names["mushrooms"], \
+            "the snapshot does not match fungi_collection"
+        table.max_mushrooms = snapshot.max_mushrooms
+        table.tables = snapshot["mud_effect_tables"]
+        table.effects = []
+        for effect_table, ids in zip(table.tables, snapshot["mud_effect_recipes"]):
+            recipe = tuple(table.mushrooms[i] for i in ids if i >= 0)
+            table.effects.append(MudEffect(effect_table, [recipe], len(recipe)))
+        table.index = {effect.signature: i for i, effect in enumerate(table.effects)}
+        return table
+    def __len__(self):
+        return len(self.effects)
+    def __iter__(self):
+        return iter(self.effects)
+    def __getitem__(self, i):
+        return self.effects[i]
+    def find(self, mud):
+        """Returns the effect of a mixed mud, or None if it is not reachable
+        with this table's mushrooms and mud size."""
+        i = self.index.get(mud.compile().tobytes())
+        return None if i is None else self.effects[i]
+    def non_identity(self):
+        """Returns the ids of every effect that changes at least one frog."""
+        return [i for i, effect in enumerate(self.effects) if not effect.is_identity()]
+
+_mud_effect_tables = {}
+
+def get_mud_effect_table(max_mushrooms=3):
+    """Returns a shared MudEffectTable over fungi_collection with the default
+    recipe cost, built on first use for each mud size."""
+    if max_mushrooms not in _mud_effect_tables:
+        _mud_effect_tables[max_mushrooms] = MudEffectTable(max_mushrooms=max_mushrooms)
+    return _mud_effect_tables[max_mushrooms]
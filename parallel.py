@@ -0,0 +1,195 @@
+# Parallel execution of exhaustive breeding searches over a process pool.
+# The per-mud contribution tables of a BreedingPlanner (see breeding.py) are
+# read-only, so they are placed once in shared memory and every worker maps
+# them rather than receiving a copy. When the search is given a catalog
+# snapshot (see snapshot.py), the workers map the tables from the snapshot
+# file instead, so that every process using the same snapshot shares one
+# copy through the page cache. Two kinds of work are split up:
+#
+# - species_distances runs one full breadth-first search per starting
+#   species, and the starting species are spread over the workers.
+# - reachable runs one breadth-first search level by level, and each level's
+#   frontier is split into shards expanded by the workers against a shared
+#   copy of the generations found so far.
+#
+# Either way, results are assembled in a fixed order (by starting species,
+# or as sorted arrays of codes) so that they do not depend on the number of
+# workers or on which worker finishes first. With workers=1 everything runs
+# in the calling process.
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from breeding import BreedingPlanner, expand_codes
+from frog import n_genomes
+from snapshot import load_snapshot
+
+class SharedArray:
+    """A NumPy array in a named block of shared memory. The creating process
+    owns the block and unlinks it on close; other processes attach to it by
+    its spec (name, shape and dtype)."""
+    def __init__(self, array=None, spec=None):
+        if spec is None:
+            array = np.ascontiguousarray(array)
+            self.memory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            self.owner = True
+            self.spec = (self.memory.name, array.shape, array.dtype.str)
+        else:
+            self.memory = shared_memory.SharedMemory(name=spec[0])
+            self.owner = False
+            self.spec = spec
+        self.array = np.ndarray(self.spec[1], dtype=np.dtype(self.spec[2]), buffer=self.memory.buf)
+        if array is not None:
+            self.array[...] = array
+    def close(self):
+        # The view must be released before the mapping can be closed.
+        self.array = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+# The arrays each worker uses, and the shared memory blocks and snapshot
+# they are mapped from, which must stay open while the worker runs.
+_worker_arrays = {}
+_worker_mappings = []
+
+def _init_worker(specs, snapshot_path=None):
+    for key, spec in specs.items():
+        shared = SharedArray(spec=spec)
+        _worker_mappings.append(shared)
+        _worker_arrays[key] = shared.array
+    if snapshot_path is not None:
+        snapshot = load_snapshot(snapshot_path)
+        _worker_mappings.append(snapshot)
+        _worker_arrays["contributions"] = snapshot["breeding_contributions"].reshape(-1, 49)
+
+def bfs_generations(flat_contributions, starts, max_generations=None, targets=None, chunk=None):
+    """Breadth-first search over the whole genome space from an array of
+    packed codes. Returns an int16 array of the generation at which each
+    genome is first reached (-1 if never). The search stops early once every
+    code in targets, if given, has been reached."""
+    generations = np.full(n_genomes, -1, dtype=np.int16)
+    frontier = np.unique(starts)
+    generations[frontier] = 0
+    chunk = chunk or max(1, (1 << 22) // len(flat_contributions))
+    generation = 0
+    while len(frontier) > 0 and (max_generations is None or generation < max_generations):
+        if targets is not None and (generations[targets] >= 0).all():
+            break
+        generation += 1
+        for begin in range(0, len(frontier), chunk):
+            children = expand_codes(flat_contributions, frontier[begin:begin + chunk]).ravel()
+            children = children[generations[children] == -1]
+            generations[children] = generation
+        frontier = np.flatnonzero(generations == generation)
+    return generations
+
+def expand_shard(flat_contributions, generations, shard, chunk=None):
+    """Returns the sorted codes of the children of a shard of the frontier
+    that have no generation yet."""
+    chunk = chunk or max(1, (1 << 22) // len(flat_contributions))
+    found = []
+    for begin in range(0, len(shard), chunk):
+        children = expand_codes(flat_contributions, shard[begin:begin + chunk]).ravel()
+        found.append(np.unique(children[generations[children] == -1]))
+    return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+def _species_row(task):
+    index, starts, target_codes, max_generations = task
+    generations = bfs_generations(_worker_arrays["contributions"], starts, max_generations,
+                                  np.concatenate(target_codes))
+    return index, species_row(generations, target_codes)
+
+def _expand_task(shard):
+    return expand_shard(_worker_arrays["contributions"], _worker_arrays["generations"], shard)
+
+def species_row(generations, target_codes):
+    """Returns the distance from a search to each target (an array of codes,
+    such as those of a species and its variants), -1 for unreachable."""
+    row = np.full(len(target_codes), -1, dtype=np.int16)
+    for j, codes in enumerate(target_codes):
+        reached = generations[codes]
+        reached = reached[reached >= 0]
+        if len(reached) > 0:
+            row[j] = reached.min()
+    return row
+
+class ParallelSearch:
+    """Runs exhaustive searches for a BreedingPlanner (a new one for
+    max_mushrooms mushrooms per mud by default, or one built from snapshot,
+    a loaded catalog Snapshot, if given) on a pool of workers processes, the
+    number of CPUs by default. With a snapshot, the workers attach to its
+    file rather than to a copy of the planner's tables. Use as a context
+    manager, or call close, so that the pool and the shared memory are
+    released."""
+    def __init__(self, planner=None, workers=None, max_mushrooms=3, snapshot=None):
+        if planner is None:
+            planner = BreedingPlanner(max_mushrooms=max_mushrooms) if snapshot is None \
+                else BreedingPlanner.from_snapshot(snapshot)
+        self.planner = planner
+        self.workers = workers or os.cpu_count() or 1
+        self.shared = {}
+        self.pool = None
+        if self.workers > 1:
+            if snapshot is None:
+                self.shared["contributions"] = SharedArray(self.planner.flat_contributions)
+            else:
+                assert np.array_equal(self.planner.flat_contributions, snapshot["breeding_contributions"].reshape(-1, 49)), \
+                    "the planner does not use the mud effects of the snapshot"
+            self.shared["generations"] = SharedArray(np.full(n_genomes, -1, dtype=np.int16))
+            specs = {key: array.spec for key, array in self.shared.items()}
+            snapshot_path = None if snapshot is None else snapshot.path
+            self.pool = multiprocessing.get_context().Pool(self.workers, _init_worker, (specs, snapshot_path))
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        for array in self.shared.values():
+            array.close()
+        self.shared = {}
+    def species_distances(self, species=None, max_generations=None):
+        """Returns (species, distances), where distances[i, j] is the fewest
+        generations from any variant of species i to any variant of species
+        j (all species of the planner's frog index by default), or -1 if it
+        is unreachable within max_generations."""
+        index = self.planner.frog_index
+        species = index.species if species is None else list(species)
+        codes = [index.codes_for_species(name) for name in species]
+        tasks = [(i, codes[i], codes, max_generations) for i in range(len(species))]
+        distances = np.empty((len(species), len(species)), dtype=np.int16)
+        if self.pool is None:
+            for i, starts, targets, generations in tasks:
+                distances[i] = species_row(bfs_generations(self.planner.flat_contributions, starts,
+                                                           generations, np.concatenate(targets)), targets)
+        else:
+            for i, row in self.pool.imap_unordered(_species_row, tasks):
+                distances[i] = row
+        return species, distances
+    def reachable(self, starts, max_generations):
+        """Returns an int16 array over the genome space of the generation at
+        which each genome is first reached from the start codes (see
+        BreedingPlanner.start_codes), -1 where it is not reached within
+        max_generations."""
+        frontier = np.unique(self.planner.start_codes(starts)).astype(np.int32)
+        if self.pool is None:
+            return bfs_generations(self.planner.flat_contributions, frontier, max_generations)
+        generations = self.shared["generations"].array
+        generations[:] = -1
+        generations[frontier] = 0
+        for generation in range(1, max_generations + 1):
+            if len(frontier) == 0:
+                break
+            # A few shards per worker, so that uneven shards still balance.
+            shards = [shard for shard in np.array_split(frontier, self.workers * 4) if len(shard) > 0]
+            frontier = np.unique(np.concatenate(self.pool.map(_expand_task, shards)))
+            generations[frontier] = generation
+        return generations.copy()
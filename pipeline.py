@@ -0,0 +1,181 @@
+# Streaming application of muds to frog inventory exports. Records are read
+# one at a time from JSON Lines or CSV, grouped into chunks, and each chunk's
+# genomes are put through the sequence of muds one generation at a time,
+# each generation being one vectorized pass over the chunk with the mud's
+# compiled table (see fungi.apply_table). The genomes are classified against
+# frog_collection with a FrogIndex after every generation, since a frog
+# keeps the species it last matched, and the records are written out as
+# soon as their chunk is done. Only one chunk is in memory at a time.
+
+# Usage:
+#
+#   python pipeline.py frogs.jsonl results.jsonl --mud "Stout Funnel + Pickled Bonnet" --mud "Chill Pill"
+#
+# Every record keeps its own fields, and gains the genetic code after the
+# muds and the species and variant it grows into. A genome that matches no
+# listed frog keeps the species it had, as in the game: that is the species
+# of the last listed frog it matched along the way, or else the record's
+# species field if it has one, or else the species matching its genetic
+# code before the muds.
+
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+import numpy as np
+
+import fungi_collection
+from fungi import apply_table, mix_mushrooms
+from frog_index import get_frog_index
+from genomes import pack_genomes
+
+default_chunk_size = 65536
+
+def find_mushroom(name):
+    """Returns a mushroom of fungi_collection by display name or by catalog
+    entry name."""
+    if name in fungi_collection.catalog:
+        return fungi_collection.catalog[name]
+    for mushroom in fungi_collection.catalog.values():
+        if mushroom.name == name:
+            return mushroom
+    assert False, f"unknown mushroom {name}"
+
+def parse_recipe(recipe_str):
+    """Parses a recipe such as "Stout Funnel + Pickled Bonnet" into a list of
+    mushrooms."""
+    return [find_mushroom(name.strip()) for name in recipe_str.split("+")]
+
+def mud_tables(recipes):
+    """Returns the compiled tables of a sequence of recipes, each a list of
+    mushrooms (or a string for parse_recipe), applied over successive
+    generations."""
+    recipes = [parse_recipe(recipe) if isinstance(recipe, str) else recipe for recipe in recipes]
+    assert len(recipes) > 0, "no muds to apply"
+    return [mix_mushrooms(recipe).compile() for recipe in recipes]
+
+def file_format(path, default="jsonl"):
+    match os.path.splitext(path)[1].lower():
+        case ".csv":
+            return "csv"
+        case ".jsonl" | ".json" | ".ndjson":
+            return "jsonl"
+    return default
+
+def read_records(f, file_format="jsonl"):
+    """Yields records as dicts from an open file of JSON Lines (objects, or
+    bare genetic code strings) or of CSV with a header row."""
+    if file_format == "csv":
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        line = line.strip()
+        if line:
+            record = json.loads(line)
+            yield record if isinstance(record, dict) else {"genetics": record}
+
+def chunked(records, size):
+    """Yields lists of up to size records."""
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+def parse_genomes(codes):
+    """Converts a list of seven-digit genetic code strings to an (N, 7)
+    uint8 array in one pass."""
+    codes = [str(code) for code in codes]
+    assert all(len(code) == 7 for code in codes), "genetic codes must have seven digits"
+    genomes = np.frombuffer("".join(codes).encode("ascii"), dtype=np.uint8).reshape(-1, 7) - ord("0")
+    assert ((genomes >= 1) & (genomes <= 7)).all(), "genetic code digits must be 1 to 7"
+    return genomes
+
+def format_genomes(genomes):
+    """Converts an (N, 7) array of trait values to genetic code strings."""
+    text = (np.asarray(genomes, dtype=np.uint8) + ord("0")).tobytes().decode("ascii")
+    return [text[i:i + 7] for i in range(0, len(text), 7)]
+
+def process_chunks(chunks, tables, frog_index=None, field="genetics", result_field="result"):
+    """Applies a sequence of compiled mud tables (or a single table), one
+    generation at a time, to every chunk of records, yielding each chunk
+    with the results added: result_field holds the new genetic code, and
+    species and variant the frog it grows into (variant None for a frog
+    matching no listed one)."""
+    frog_index = frog_index or get_frog_index()
+    tables = [tables] if np.ndim(tables) == 2 else list(tables)
+    for chunk in chunks:
+        genomes = parse_genomes([record[field] for record in chunk])
+        given = np.array([frog_index.species_id(record["species"])
+                          if record.get("species") in frog_index.species else -1 for record in chunk], dtype=np.int16)
+        matched = frog_index.species_ids(pack_genomes(genomes))
+        species = np.where(matched >= 0, matched, given)
+        for table in tables:
+            apply_table(table, genomes, out=genomes)
+            matched = frog_index.species_ids(pack_genomes(genomes))
+            species = np.where(matched >= 0, matched, species)
+        frog_ids = frog_index.frog_ids(pack_genomes(genomes))
+        for record, code, frog_id, species_id in zip(chunk, format_genomes(genomes), frog_ids, species):
+            record[result_field] = code
+            record["species"] = frog_index.species[species_id] if species_id >= 0 else record.get("species")
+            record["variant"] = frog_index.frogs[frog_id].variant if frog_id >= 0 else None
+        yield chunk
+
+def write_records(chunks, f, file_format="jsonl"):
+    """Writes chunks of records to an open file as they come, flushing after
+    each chunk. Returns the number of records written."""
+    written = 0
+    writer = None
+    for chunk in chunks:
+        if file_format == "csv":
+            if writer is None and chunk:
+                writer = csv.DictWriter(f, fieldnames=list(chunk[0].keys()), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerows(chunk)
+        else:
+            for record in chunk:
+                f.write(json.dumps(record))
+                f.write("\n")
+        f.flush()
+        written += len(chunk)
+    return written
+
+def run_pipeline(input_file, output_file, recipes, input_format="jsonl", output_format="jsonl",
+                 chunk_size=default_chunk_size, field="genetics", result_field="result", frog_index=None):
+    """Streams records from input_file to output_file (open files), applying
+    the sequence of mud recipes to each. Returns the number of records."""
+    tables = mud_tables(recipes)
+    chunks = chunked(read_records(input_file, input_format), chunk_size)
+    return write_records(process_chunks(chunks, tables, frog_index, field, result_field),
+                         output_file, output_format)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Apply a sequence of muds to a frog inventory export.")
+    parser.add_argument("input", help="JSON Lines or CSV file of records, or - for standard input")
+    parser.add_argument("output", help="file to write the results to, or - for standard output")
+    parser.add_argument("--mud", "-m", action="append", required=True,
+                        help='recipe for one generation, such as "Stout Funnel + Chill Pill" (repeatable)')
+    parser.add_argument("--input-format", choices=("jsonl", "csv"), help="default: from the file extension")
+    parser.add_argument("--output-format", choices=("jsonl", "csv"), help="default: from the file extension")
+    parser.add_argument("--field", default="genetics", help="field holding the genetic code (default genetics)")
+    parser.add_argument("--result-field", default="result", help="field for the new genetic code (default result)")
+    parser.add_argument("--chunk-size", type=int, default=default_chunk_size)
+    args = parser.parse_args(argv)
+    input_format = args.input_format or file_format(args.input)
+    output_format = args.output_format or file_format(args.output)
+    input_file = sys.stdin if args.input == "-" else open(args.input, newline="")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        count = run_pipeline(input_file, output_file, args.mud, input_format, output_format,
+                             args.chunk_size, args.field, args.result_field)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    print(f"{count} records", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
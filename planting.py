@@ -0,0 +1,235 @@
+# Planning which flowers to plant so that critters can spawn. Some critters
+# only spawn in a habitat created by a flower (Speckled Empresses in Red
+# Lilies, for instance), and a flower, once found, can be planted on its
+# tile type in any location of its native domain (see flora.py). A planting
+# is one flower in one location, and it lets every critter whose habitat the
+# flower creates spawn there, if the critter belongs to that domain and
+# location and can spawn on the flower's tile type. The other habitats (reeds, marsh shrubs and so on) occur
+# naturally, so critters living in them need no planting.
+
+# All of this is worked out once, when a FlowerIndex is built: the flowers
+# creating each habitat, the plantings that bring each critter, and the
+# critters of each flavor, so that planning only looks up its requirements.
+# Requirements are critters wanted by name, or flavors that any critter of
+# that flavor will do for, and as there are only a few, the fewest plantings
+# meeting all of them are found exactly by dynamic programming over masks of
+# requirements, as in feeding.py.
+
+import critters_collection
+import flora_collection
+from critters import Critter, all_flavors
+from environment import waking_locations, dream_locations
+from flora import Flower
+
+domain_locations = {"Waking": waking_locations, "Dream": dream_locations}
+
+def all_flowers():
+    """Returns every flower in flora_collection, in the order defined."""
+    return list(flora_collection.catalog.values())
+
+class Planting:
+    """One flower planted in one location, on the flower's tile type, with
+    the critters it lets spawn there and the cost of planting it."""
+    def __init__(self, flower, location, critters, cost=1):
+        self.flower = flower
+        self.location = location
+        self.critters = critters
+        self.cost = cost
+    @property
+    def domain(self):
+        return self.flower.domain
+    @property
+    def tile_type(self):
+        return self.flower.tile_type
+    @property
+    def habitat(self):
+        return self.flower.habitat_created
+    @property
+    def flavors(self):
+        return sorted(set(critter.flavor for critter in self.critters))
+    def __repr__(self):
+        return f"Planting({self.flower.name}, {self.tile_type}, {self.domain}, {self.location})"
+
+class FlowerIndex:
+    """Join of flora_collection and critters_collection (or the given
+    flowers and critters) on habitat. flowers_for_habitat maps each habitat
+    to the flowers creating it, plantings lists every planting that lets
+    some critter spawn (on one of its tile types), plantings_for maps each critter name to the
+    plantings it can spawn in, natural lists the critters whose habitat no
+    flower creates, and critters_for_flavor maps each flavor to its
+    critters."""
+    def __init__(self, flowers=None, critters=None):
+        self.flowers = all_flowers() if flowers is None else list(flowers)
+        self.critters = list(critters_collection.catalog.values()) if critters is None else list(critters)
+        self.flowers_for_habitat = {}
+        for flower in self.flowers:
+            if flower.habitat_created is not None:
+                self.flowers_for_habitat.setdefault(flower.habitat_created, []).append(flower)
+        self.critters_for_flavor = {flavor: [] for flavor in sorted(all_flavors)}
+        self.natural = []
+        spawns = {}
+        for critter in self.critters:
+            self.critters_for_flavor[critter.flavor].append(critter)
+            flowers = self.flowers_for_habitat.get(critter.habitat)
+            if flowers is None:
+                self.natural.append(critter)
+                continue
+            for flower in flowers:
+                if flower.domain != critter.domain or flower.tile_type not in critter.tile_types:
+                    continue
+                for location in sorted(domain_locations[flower.domain] & set(critter.locations)):
+                    spawns.setdefault((flower.name, location), (flower, []))[1].append(critter)
+        self.plantings = [Planting(flower, location, critters)
+                          for (_, location), (flower, critters) in spawns.items()]
+        self.plantings_for = {critter.name: [] for critter in self.critters}
+        for planting in self.plantings:
+            for critter in planting.critters:
+                self.plantings_for[critter.name].append(planting)
+        self._critters = {critter.name: critter for critter in self.critters}
+    def critter(self, name):
+        assert name in self._critters, f"unknown critter {name}"
+        return self._critters[name]
+
+_flower_index = None
+
+def get_flower_index():
+    """Returns a shared FlowerIndex, built on first use."""
+    global _flower_index
+    if _flower_index is None:
+        _flower_index = FlowerIndex()
+    return _flower_index
+
+class PlantingPlan:
+    """The plantings chosen for a set of requirements (critter names and
+    flavors), and their total cost. sources maps each requirement to the
+    planting meeting it, or to a critter in a natural habitat if none is
+    needed."""
+    def __init__(self, plantings, sources):
+        self.plantings = plantings
+        self.sources = sources
+        self.cost = sum(planting.cost for planting in plantings)
+    def by_flower(self):
+        """Returns a dict from flower name to the locations to plant it in."""
+        locations = {}
+        for planting in self.plantings:
+            locations.setdefault(planting.flower.name, []).append(planting.location)
+        return locations
+    def __len__(self):
+        return len(self.plantings)
+    def __iter__(self):
+        return iter(self.plantings)
+
+class PlantingPlanner:
+    """Plans plantings from a FlowerIndex (the shared one by default),
+    optionally restricted to some locations. The cost of a planting is given
+    by cost(flower, location), 1 by default, so that plans use the fewest
+    plantings. Unless natural is False, critters in natural habitats (within
+    the allowed locations) meet requirements without any planting."""
+    def __init__(self, flower_index=None, locations=None, cost=None, natural=True):
+        self.flower_index = flower_index or get_flower_index()
+        self.locations = None if locations is None else set(locations)
+        cost = cost or (lambda flower, location: 1)
+        self.plantings = [Planting(planting.flower, planting.location, planting.critters,
+                                   cost(planting.flower, planting.location))
+                          for planting in self.flower_index.plantings
+                          if self.locations is None or planting.location in self.locations]
+        self.natural = [critter for critter in self.flower_index.natural
+                        if natural and (self.locations is None or self.locations & set(critter.locations))]
+    def requirements(self, flavors=None, critters=None):
+        """Returns the requirements as a list of (kind, name) pairs, kind
+        being "flavor" or "critter"."""
+        requirements = []
+        for flavor in flavors or []:
+            assert flavor in all_flavors, f"invalid flavor {flavor}"
+            requirements.append(("flavor", flavor))
+        for critter in critters or []:
+            name = critter.name if hasattr(critter, "name") else critter
+            self.flower_index.critter(name)
+            requirements.append(("critter", name))
+        return list(dict.fromkeys(requirements))
+    def meets(self, requirement, critter):
+        kind, name = requirement
+        return critter.flavor == name if kind == "flavor" else critter.name == name
+    def plan(self, flavors=None, critters=None):
+        """Returns the PlantingPlan of least cost (then fewest plantings)
+        meeting every requirement, given as flavors (any critter of each
+        will do) and critters (names or Critter objects), or None if some
+        requirement cannot be met."""
+        requirements = self.requirements(flavors, critters)
+        sources = {}
+        for requirement in requirements:
+            for critter in self.natural:
+                if self.meets(requirement, critter):
+                    sources[requirement] = critter
+                    break
+        remaining = [requirement for requirement in requirements if requirement not in sources]
+        # Candidate plantings come from the index: those of the critters
+        # that could meet each remaining requirement.
+        masks = {}
+        for bit, requirement in enumerate(remaining):
+            kind, name = requirement
+            candidates = self.flower_index.critters_for_flavor[name] if kind == "flavor" \
+                else [self.flower_index.critter(name)]
+            for critter in candidates:
+                for planting in self.flower_index.plantings_for[critter.name]:
+                    key = (planting.flower.name, planting.location)
+                    masks[key] = masks.get(key, 0) | 1 << bit
+        plantings = {(planting.flower.name, planting.location): planting for planting in self.plantings}
+        best_planting = {}
+        for key, mask in masks.items():
+            if key in plantings and (mask not in best_planting or plantings[key].cost < best_planting[mask].cost):
+                best_planting[mask] = plantings[key]
+        needed = (1 << len(remaining)) - 1
+        best = {0: (0, 0, None, None)}
+        for mask in range(needed + 1):
+            if mask not in best:
+                continue
+            cost, count, _, _ = best[mask]
+            for planting_mask, planting in best_planting.items():
+                new_mask = mask | planting_mask
+                if new_mask == mask:
+                    continue
+                new = (cost + planting.cost, count + 1, mask, planting)
+                if new_mask not in best or new[:2] < best[new_mask][:2]:
+                    best[new_mask] = new
+        if needed not in best:
+            return None
+        chosen = []
+        mask = needed
+        while mask:
+            previous, planting = best[mask][2:]
+            chosen.append(planting)
+            for bit, requirement in enumerate(remaining):
+                if (mask & ~previous) >> bit & 1:
+                    sources[requirement] = planting
+            mask = previous
+        return PlantingPlan(chosen[::-1], {requirement: sources[requirement] for requirement in requirements})
+
+def check_tile_types():
+    """Checks that every planting of the shared FlowerIndex is on a tile
+    type its critters spawn on, and that a made-up critter living in the
+    habitat of a made-up flower gets no planting when it does not spawn on
+    the flower's tile type, while one that does gets a planting in each of
+    its locations. Returns the number of plantings checked."""
+    index = get_flower_index()
+    for planting in index.plantings:
+        for critter in planting.critters:
+            assert planting.tile_type in critter.tile_types, \
+                f"{critter.name} cannot spawn in {planting}, on {planting.tile_type}"
+    locations = ["Residential District", "Central Junction"]
+    flower = Flower("Check Lily", "Waking", locations[:1], "water", habitat_created="Red Lilies")
+    on_water = Critter("Check Skater", "Sweet", "Waking", locations, "Red Lilies", "grass, water",
+                       "Daytime", "not raining")
+    on_grass = Critter("Check Hopper", "Sweet", "Waking", locations, "Red Lilies", "grass",
+                       "Daytime", "not raining")
+    made_up = FlowerIndex([flower], [on_water, on_grass])
+    assert made_up.plantings_for[on_grass.name] == [], f"{on_grass.name} spawns on grass but can use {flower.name}"
+    assert on_grass not in made_up.natural, f"{on_grass.name} needs a flower but is listed as natural"
+    assert PlantingPlanner(made_up).plan(critters=[on_grass.name]) is None, \
+        f"a plan was found for {on_grass.name}"
+    found = sorted(planting.location for planting in made_up.plantings_for[on_water.name])
+    assert found == sorted(locations), f"{on_water.name} can be brought to {found}, not {locations}"
+    return len(index.plantings) + len(made_up.plantings)
+
+if __name__ == "__main__":
+    print(f"{check_tile_types()} plantings checked")
@@ -0,0 +1,175 @@
+# Simulation of a frog population over many generations of breeding and
+# mud. Each generation, the frogs are paired at random and every pair
+# spawns a clutch of tadpoles, which inherit each trait from either parent
+# with equal probability (as in Frog.spawn). The tadpoles may then be
+# exposed to a batch of mud, which takes effect on each tadpole with a given
+# probability (the mud may also do nothing; see frog.py). Tadpoles whose new
+# genetic code matches a listed species or variant become that species, and
+# the others keep the species of their mother (the first frog of the pair).
+
+# The population is stored as parallel arrays rather than Frog objects, and
+# every step is vectorized over all tadpoles, with random numbers drawn from
+# a seeded NumPy generator so that runs can be reproduced exactly.
+
+import numpy as np
+
+from fungi import apply_table, mix_mushrooms
+from frog_index import get_frog_index
+from genomes import genomes_from_codes, pack_genomes, unpack_genomes
+
+class Population:
+    """A population of frogs as an (N, 7) uint8 array of trait values and an
+    int16 array of species ids (from a FrogIndex, -1 for unknown). The trait
+    values are stored padded to eight bytes per frog, so that each genome
+    can also be handled as a single 64-bit word."""
+    def __init__(self, genomes, species):
+        genomes = np.asarray(genomes, dtype=np.uint8).reshape(-1, 7)
+        self.rows = np.zeros((len(genomes), 8), dtype=np.uint8)
+        self.rows[:, :7] = genomes
+        self.species = np.asarray(species, dtype=np.int16)
+        assert len(self.species) == len(self.rows), "one species id is needed per genome"
+    @classmethod
+    def from_words(cls, words, species):
+        population = cls.__new__(cls)
+        population.rows = np.ascontiguousarray(words, dtype=np.uint64).view(np.uint8).reshape(-1, 8)
+        population.species = np.asarray(species, dtype=np.int16)
+        return population
+    @property
+    def genomes(self):
+        return self.rows[:, :7]
+    @property
+    def words(self):
+        return self.rows.view(np.uint64).reshape(-1)
+    def __len__(self):
+        return len(self.rows)
+    @classmethod
+    def from_frogs(cls, frogs, frog_index=None):
+        frog_index = frog_index or get_frog_index()
+        frogs = list(frogs)
+        return cls(genomes_from_codes([str(frog.genetics) for frog in frogs]),
+                   [frog_index.species_id(frog.species) for frog in frogs])
+    @classmethod
+    def of_species(cls, species, count, frog_index=None):
+        """A population of count frogs with the genetic code of a species."""
+        frog_index = frog_index or get_frog_index()
+        species_id = frog_index.species_id(species)
+        code = frog_index.frog_codes[frog_index.frog_species == species_id][0]
+        return cls(np.repeat(unpack_genomes([code]), count, axis=0), np.full(count, species_id, dtype=np.int16))
+    def species_counts(self, n_species):
+        return np.bincount(self.species[self.species >= 0], minlength=n_species)
+    def trait_means(self):
+        if len(self) == 0:
+            return np.full(7, np.nan)
+        counts = np.stack([np.bincount(self.rows[:, t], minlength=8) for t in range(7)])
+        return counts @ np.arange(8) / len(self)
+
+class PopulationHistory:
+    """Per-generation statistics of a simulation, starting with the initial
+    population: sizes, species counts (generations, species) and mean trait
+    values (generations, 7)."""
+    def __init__(self):
+        self.sizes = []
+        self.species_counts = []
+        self.trait_means = []
+    def record(self, population, n_species):
+        self.sizes.append(len(population))
+        self.species_counts.append(population.species_counts(n_species))
+        self.trait_means.append(population.trait_means())
+    def arrays(self):
+        return np.array(self.sizes), np.array(self.species_counts), np.array(self.trait_means)
+
+# The 64-bit masks selecting the bytes of the traits whose bit is set in a
+# number from 0 to 127, in the byte order of the genome words.
+inheritance_masks = np.array([[0xFF if bits >> t & 1 else 0 for t in range(8)] for bits in range(128)],
+                             dtype=np.uint8).view(np.uint64).reshape(-1)
+
+def mud_table(mud):
+    """Returns the compiled table of a mud given as a Mud, a compiled (7, 7)
+    table or a recipe (a list of mushrooms), or None for no mud."""
+    if mud is None:
+        return None
+    if hasattr(mud, "compile"):
+        return mud.compile()
+    if isinstance(mud, np.ndarray):
+        assert mud.shape == (7, 7), "mud tables must have shape (7, 7)"
+        return mud
+    return mix_mushrooms(mud).compile()
+
+class PopulationSimulator:
+    """Breeds populations with random pairing and applies muds, drawing from
+    a NumPy generator seeded with seed. Every pair spawns clutch_size
+    tadpoles, and if max_population is given, each generation is cut down to
+    at most that many, keeping whole clutches from random pairs (so the
+    population is a multiple of clutch_size). Muds take effect on each
+    tadpole with probability success, unless another probability is given
+    for a particular mud."""
+    def __init__(self, frog_index=None, seed=None, clutch_size=2, max_population=None, success=1.0):
+        self.frog_index = frog_index or get_frog_index()
+        self.rng = np.random.default_rng(seed)
+        self.clutch_size = clutch_size
+        self.max_population = max_population
+        self.success = success
+    def breed(self, population):
+        """Returns the tadpoles of one generation: the frogs are shuffled and
+        paired off (an odd frog out has no mate), and each trait of each
+        tadpole comes from either parent with equal probability."""
+        order = self.rng.permutation(len(population))
+        pairs = len(order) // 2
+        mothers = np.repeat(order[:pairs], self.clutch_size)
+        fathers = np.repeat(order[pairs:2 * pairs], self.clutch_size)
+        if self.max_population is not None:
+            # Keep whole clutches only, from the first pairs of the shuffle.
+            kept = self.max_population // self.clutch_size * self.clutch_size
+            mothers = mothers[:kept]
+            fathers = fathers[:kept]
+        # Seven random bits per tadpole choose the parent of each trait, and
+        # select whole bytes of the parents' genome words at once.
+        masks = inheritance_masks[self.rng.integers(0, 128, len(mothers), dtype=np.uint8)]
+        words = (population.words[fathers] & masks) | (population.words[mothers] & ~masks)
+        tadpoles = Population.from_words(words, population.species[mothers])
+        tadpoles.species = self.classify(tadpoles.genomes, tadpoles.species)
+        return tadpoles
+    def apply_mud(self, population, mud, success=None):
+        """Applies a mud (see mud_table) to the population in place, taking
+        effect on each tadpole with probability success, and reclassifies
+        the tadpoles it changes."""
+        table = mud_table(mud)
+        if table is None or len(population) == 0:
+            return population
+        success = self.success if success is None else success
+        if success >= 1:
+            apply_table(table, population.genomes, out=population.genomes)
+        else:
+            worked = np.flatnonzero(self.rng.random(len(population)) < success)
+            population.rows[worked, :7] = apply_table(table, population.rows[worked, :7])
+        population.species = self.classify(population.genomes, population.species)
+        return population
+    def classify(self, genomes, previous):
+        species = self.frog_index.species_ids(pack_genomes(genomes))
+        return np.where(species >= 0, species, previous).astype(np.int16)
+    def step(self, population, mud=None, success=None):
+        """Runs one generation: breeding, then the mud, if any."""
+        return self.apply_mud(self.breed(population), mud, success)
+    def run(self, population, generations, mud=None, muds=None, success=None):
+        """Runs a number of generations and returns the final population and
+        its PopulationHistory. Either mud is used every generation, or muds
+        gives the mud of each generation: a sequence with one mud (or None)
+        per generation, or a function of the generation number returning a
+        mud or a (mud, success) pair."""
+        assert mud is None or muds is None, "give either mud or muds, not both"
+        history = PopulationHistory()
+        n_species = len(self.frog_index.species)
+        history.record(population, n_species)
+        for generation in range(generations):
+            mud_success = success
+            if callable(muds):
+                mud = muds(generation)
+                if isinstance(mud, tuple):
+                    mud, mud_success = mud
+            elif muds is not None:
+                mud = muds[generation] if generation < len(muds) else None
+            population = self.step(population, mud, mud_success)
+            history.record(population, n_species)
+            if len(population) < 2:
+                break
+        return population, history
@@ -0,0 +1,75 @@
+# Inverse lookup from a change of genome to the muds that make it. A mixed
+# mud acts on each trait independently (see Mud.compile), so a mud takes one
+# genome to another in one generation exactly when, for each of the seven
+# traits, it takes the old value of that trait to the new one. The index
+# below keeps, for every trait and every (old value, new value) pair, the set
+# of distinct mud effects making that transition as a packed bitset. The
+# transitions cover additive deltas as well as the results of min, max,
+# suppress and clamping. A query is then seven table lookups and a bitwise
+# AND, followed by reading off the recipes of the matching effects.
+
+import numpy as np
+
+from genomes import genomes_from_codes, unpack_genomes
+from mud_effects import get_mud_effect_table
+
+class InverseRecipeIndex:
+    """Index from genome transitions to the mud effects of a MudEffectTable
+    (the shared table for max_mushrooms mushrooms per mud by default). The
+    transitions array has shape (7, 7, 7, n_bytes): entry [t, old - 1,
+    new - 1] is the packed bitset of effect ids taking trait t from old to
+    new."""
+    def __init__(self, effect_table=None, max_mushrooms=3):
+        if effect_table is None:
+            effect_table = get_mud_effect_table(max_mushrooms)
+        self.effect_table = effect_table
+        n_effects = len(effect_table)
+        tables = effect_table.tables.astype(np.intp) - 1
+        transitions = np.zeros((7, 7, 7, n_effects), dtype=bool)
+        effects = np.arange(n_effects)
+        for t in range(7):
+            for old in range(7):
+                transitions[t, old, tables[:, t, old], effects] = True
+        self.transitions = np.packbits(transitions, axis=-1)
+    def effect_ids(self, source, target):
+        """Returns the ids of the effects taking the source genetic code to
+        the target genetic code in one generation."""
+        sources, targets = genomes_from_codes([source, target]).astype(np.intp) - 1
+        bits = self.transitions[0, sources[0], targets[0]]
+        for t in range(1, 7):
+            bits = bits & self.transitions[t, sources[t], targets[t]]
+        return np.flatnonzero(np.unpackbits(bits, count=len(self.effect_table)))
+    def effects(self, source, target):
+        """Returns the MudEffects taking source to target in one generation."""
+        return [self.effect_table[i] for i in self.effect_ids(source, target)]
+    def recipes(self, source, target):
+        """Returns every recipe kept in the effect table that turns source
+        into target in one generation, cheapest effects first."""
+        return [recipe for effect in self.effects(source, target) for recipe in effect.recipes]
+    def batch_effect_ids(self, sources, targets, chunk=65536):
+        """Batched form of effect_ids for arrays of source and target genomes,
+        given as packed codes or (N, 7) arrays of trait values. Returns a pair
+        of arrays (pair ids, effect ids) listing every matching effect of
+        every source/target pair, ordered by pair and then by effect."""
+        sources = self._genomes(sources)
+        targets = self._genomes(targets)
+        assert sources.shape == targets.shape, "sources and targets must have the same shape"
+        pair_ids = []
+        effect_ids = []
+        for begin in range(0, len(sources), chunk):
+            s = sources[begin:begin + chunk].astype(np.intp) - 1
+            d = targets[begin:begin + chunk].astype(np.intp) - 1
+            bits = self.transitions[0, s[:, 0], d[:, 0]]
+            for t in range(1, 7):
+                bits &= self.transitions[t, s[:, t], d[:, t]]
+            pairs, effects = np.nonzero(np.unpackbits(bits, axis=1, count=len(self.effect_table)))
+            pair_ids.append(pairs + begin)
+            effect_ids.append(effects)
+        if len(pair_ids) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return np.concatenate(pair_ids), np.concatenate(effect_ids)
+    def _genomes(self, genomes):
+        genomes = np.asarray(genomes)
+        if genomes.ndim == 1:
+            return unpack_genomes(genomes)
+        return genomes
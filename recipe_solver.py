@@ -0,0 +1,312 @@
+# Solver for the cheapest mud recipes with a given net effect. Mixing mud
+# (see Mud.mix_mud) looks at each trait separately, and what it makes of the
+# modifiers on one trait depends only on a small aggregate of them: how many
+# there are (none, one, or more), the single modifier if there is only one,
+# the sum of the additive scalars, the product of the multiplicative ones,
+# and whether any suppress, min or max is among them. These aggregates
+# combine without regard to order, so a recipe can be split into two halves
+# whose aggregates are combined at the end: the solver enumerates every
+# multiset of up to half the largest recipe size once, and then checks
+# every pair of halves against the target at once with NumPy (a
+# meet-in-the-middle search), rather than enumerating every full recipe.
+# Before pairing, halves that can never be part of a matching recipe are
+# dropped, since suppress, min and max can never be undone by adding more
+# mushrooms: a suppress rules out any effect on a trait, a min or max rules
+# out an additive one, and a min rules out a max and vice versa.
+
+# Two details of mix_mud are worth spelling out. A lone modifier on a trait
+# is passed through unchanged, so a single mult really multiplies the trait
+# value, while a mult with other modifiers only scales their additive sum.
+# And when a trait has both a min and a max (without a suppress), the result
+# depends on the order of the mushrooms, so such recipes are never returned.
+
+import random
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+from fungi import Mud, Mushroom
+from mud_effects import all_mushrooms
+
+trait_order = "ANOURES"
+operations = ("add", "mult", "min", "max", "suppress")
+suppress_flag = 1
+min_flag = 2
+max_flag = 4
+operation_flags = {"suppress": suppress_flag, "min": min_flag, "max": max_flag}
+
+# Net modifiers are encoded as single integers, (operation + 1) *
+# result_base + scalar + result_offset, with 0 in place of operation + 1 for
+# no change and 6 for an invalid (order-dependent) combination, so that they
+# can be compared in bulk.
+result_base = 1 << 16
+result_offset = 1 << 15
+no_change = result_offset
+invalid = 6 * result_base + result_offset
+
+def encode_result(result):
+    if result is None:
+        return no_change
+    operation, scalar = result
+    return (operations.index(operation) + 1) * result_base + scalar + result_offset
+
+def parse_target(target_str):
+    """Parses a target such as "+2 U, -1 R, max S" into a dict from trait
+    code to net modifier. Terms are "+k X" or "-k X" (add), "xk X" (a lone
+    mult), "min X", "max X" (or "minimize X", "maximize X"), "none X" (no
+    change) and "any X" (unconstrained)."""
+    target = {}
+    for term in target_str.split(","):
+        words = term.split()
+        assert len(words) == 2 and words[1] in trait_order, f"invalid target term {term.strip()}"
+        operation, code = words[0].lower(), words[1]
+        match operation[0]:
+            case "+" | "-":
+                target[code] = ("add", int(operation))
+            case "x":
+                target[code] = ("mult", int(operation[1:]))
+            case _ if operation in ("min", "minimize"):
+                target[code] = ("min", 0)
+            case _ if operation in ("max", "maximize"):
+                target[code] = ("max", 0)
+            case _ if operation == "none":
+                target[code] = None
+            case _ if operation == "any":
+                target[code] = "any"
+            case _:
+                assert False, f"invalid target term {term.strip()}"
+    return target
+
+class RecipeHalves:
+    """Every multiset of exactly size mushrooms, with the per-trait
+    aggregates of its modifiers as (N, 7) arrays: count (capped at 2),
+    additive sum, multiplicative product, flags, and the operation (-1 if
+    none) and scalar of the single modifier when count is 1. Recipes are
+    tuples of mushroom indices in increasing order."""
+    def __init__(self, modifiers, size):
+        self.recipes = list(combinations_with_replacement(range(len(modifiers)), size))
+        shape = (len(self.recipes), 7)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.total = np.zeros(shape, dtype=np.int64)
+        self.product = np.ones(shape, dtype=np.int64)
+        self.flags = np.zeros(shape, dtype=np.int64)
+        self.single_operation = np.full(shape, -1, dtype=np.int64)
+        self.single_scalar = np.zeros(shape, dtype=np.int64)
+        for r, recipe in enumerate(self.recipes):
+            for i in recipe:
+                for t, operation, scalar in modifiers[i]:
+                    self.count[r, t] += 1
+                    if operation == "add":
+                        self.total[r, t] += scalar
+                    elif operation == "mult":
+                        self.product[r, t] *= scalar
+                    self.flags[r, t] |= operation_flags.get(operation, 0)
+                    self.single_operation[r, t] = operations.index(operation)
+                    self.single_scalar[r, t] = scalar
+        self.single_operation[self.count != 1] = -1
+        self.single_scalar[self.count != 1] = 0
+        self.count = np.minimum(self.count, 2)
+        self.first = np.array([recipe[0] if recipe else -1 for recipe in self.recipes], dtype=np.int64)
+        self.last = np.array([recipe[-1] if recipe else -1 for recipe in self.recipes], dtype=np.int64)
+    def __len__(self):
+        return len(self.recipes)
+    def viable(self, targets):
+        """Returns a boolean array marking the halves that can still be part
+        of a recipe with the given per-trait targets."""
+        viable = np.ones(len(self), dtype=bool)
+        for t, target in enumerate(targets):
+            if target is None or target == "any":
+                continue
+            flags = self.flags[:, t]
+            viable &= (flags & suppress_flag) == 0
+            match target[0]:
+                case "add":
+                    viable &= (flags & (min_flag | max_flag)) == 0
+                case "min":
+                    viable &= (flags & max_flag) == 0
+                case "max":
+                    viable &= (flags & min_flag) == 0
+                case "mult":
+                    viable &= self.count[:, t] <= 1
+        return viable
+
+def combined_results(first, second, a, b, traits):
+    """Returns the encoded net modifiers on the given traits, shape (len(a),
+    len(b), len(traits)), of every recipe made of half a of first and half b
+    of second (index arrays)."""
+    a = np.ix_(a, traits)
+    b = np.ix_(b, traits)
+    count = first.count[a][:, None] + second.count[b][None]
+    total = first.total[a][:, None] + second.total[b][None]
+    product = first.product[a][:, None] * second.product[b][None]
+    flags = first.flags[a][:, None] | second.flags[b][None]
+    # With two or more modifiers: suppress, then min or max, then the sum of
+    # the adds scaled by the product of the mults.
+    net = total * product
+    result = np.where(net != 0, (operations.index("add") + 1) * result_base + net + result_offset, no_change)
+    result = np.where(flags & max_flag, (operations.index("max") + 1) * result_base + result_offset, result)
+    result = np.where(flags & min_flag, (operations.index("min") + 1) * result_base + result_offset, result)
+    result = np.where(((flags & min_flag) != 0) & ((flags & max_flag) != 0), invalid, result)
+    result = np.where(flags & suppress_flag, no_change, result)
+    # With a single modifier, it is passed through as it is (a suppress or
+    # an add of 0 being no change, and min and max having no scalar). Only
+    # one half has a modifier on the trait then, and the other half's single
+    # operation is -1 and its scalar 0.
+    single_operation = np.maximum(first.single_operation[a][:, None], second.single_operation[b][None])
+    single_scalar = first.single_scalar[a][:, None] + second.single_scalar[b][None]
+    single = (single_operation + 1) * result_base + single_scalar + result_offset
+    single = np.where(single_operation >= operations.index("min"), single - single_scalar, single)
+    single = np.where((single_operation == operations.index("suppress"))
+                      | ((single_operation == operations.index("add")) & (single_scalar == 0)), no_change, single)
+    result = np.where(count == 1, single, result)
+    return np.where(count == 0, no_change, result)
+
+class RecipeSolver:
+    """Finds every cheapest multiset of the given mushrooms (all of
+    fungi_collection by default), with at most max_mushrooms of them, whose
+    mixed mud has a target net effect. The cost of a mushroom is given by
+    cost(mushroom), 1 by default so that the fewest mushrooms are used, and
+    must be positive. The halves are enumerated when the solver is created,
+    and shared by every query."""
+    def __init__(self, mushrooms=None, cost=None, max_mushrooms=6, chunk=1 << 20):
+        self.mushrooms = all_mushrooms() if mushrooms is None else list(mushrooms)
+        self.costs = np.array([cost(mushroom) if cost else 1 for mushroom in self.mushrooms], dtype=float)
+        assert (self.costs > 0).all(), "mushroom costs must be positive"
+        self.max_mushrooms = max_mushrooms
+        self.chunk = chunk
+        modifiers = [[(trait_order.index(code), mod.operation, mod.scalar)
+                      for code, mods in mushroom.modifier.modifiers.items() for mod in mods]
+                     for mushroom in self.mushrooms]
+        self.halves = [RecipeHalves(modifiers, size) for size in range((max_mushrooms + 1) // 2 + 1)]
+        self.half_costs = [np.array([self.costs[list(recipe)].sum() for recipe in halves.recipes])
+                           for halves in self.halves]
+    def targets(self, target, others=None):
+        """Returns the per-trait targets, in ANOURES order, of a target given
+        as a string (see parse_target) or a dict. Traits not mentioned must
+        stay unchanged, unless others is "any"."""
+        if isinstance(target, str):
+            target = parse_target(target)
+        for code in target:
+            assert code in trait_order, f"invalid trait code {code}"
+        return tuple(target.get(code, others) for code in trait_order)
+    def matches(self, targets, size):
+        """Returns (cost, recipe) for every recipe of exactly size mushrooms
+        with the target effect, recipes being tuples of mushroom indices."""
+        first = self.halves[size // 2]
+        second = self.halves[size - size // 2]
+        constrained = [t for t, target in enumerate(targets) if target != "any"]
+        unconstrained = [t for t, target in enumerate(targets) if target == "any"]
+        wanted = np.array([encode_result(targets[t]) for t in constrained], dtype=np.int64)
+        a_ids = np.flatnonzero(first.viable(targets))
+        b_ids = np.flatnonzero(second.viable(targets))
+        found = []
+        if len(a_ids) == 0 or len(b_ids) == 0:
+            return found
+        # Each multiset is split once, with its smallest mushrooms in the
+        # first half, so halves are paired by the last mushroom of the first.
+        for last in np.unique(first.last[a_ids]):
+            group = a_ids[first.last[a_ids] == last]
+            b = b_ids[second.first[b_ids] >= last]
+            if len(b) == 0:
+                continue
+            rows = max(1, self.chunk // (len(b) * 7))
+            for begin in range(0, len(group), rows):
+                a = group[begin:begin + rows]
+                matched = (combined_results(first, second, a, b, constrained) == wanted).all(axis=-1)
+                if unconstrained:
+                    # Recipes whose effect depends on the order of the
+                    # mushrooms are left out even on unconstrained traits.
+                    matched &= (combined_results(first, second, a, b, unconstrained) != invalid).all(axis=-1)
+                for i, j in zip(*np.nonzero(matched)):
+                    recipe = first.recipes[a[i]] + second.recipes[b[j]]
+                    found.append((self.half_costs[size // 2][a[i]] + self.half_costs[size - size // 2][b[j]],
+                                  recipe))
+        return found
+    def solve(self, target, others=None):
+        """Returns (cost, recipes), with every recipe of least cost as a
+        tuple of mushrooms, or (None, []) if no recipe of at most
+        max_mushrooms mushrooms has the target effect."""
+        targets = self.targets(target, others)
+        best_cost = None
+        best = []
+        min_cost = self.costs.min()
+        for size in range(1, self.max_mushrooms + 1):
+            # Larger recipes cannot be cheaper once size times the cost of
+            # the cheapest mushroom exceeds the best cost found.
+            if best_cost is not None and size * min_cost > best_cost:
+                break
+            for cost, recipe in self.matches(targets, size):
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    best = [recipe]
+                elif cost == best_cost:
+                    best.append(recipe)
+        if best_cost is None:
+            return None, []
+        if best_cost == int(best_cost):
+            best_cost = int(best_cost)
+        return best_cost, [tuple(self.mushrooms[i] for i in recipe) for recipe in sorted(best)]
+
+def net_effects(recipe):
+    """Returns the net modifier of the mud mixed from a recipe on each trait,
+    in ANOURES order, as None for no change (which includes a lone suppress
+    and an add of 0) or as an (operation, scalar) pair. Returns None instead
+    if the result depends on the order of the mushrooms, that is if a trait
+    has both a min and a max and no suppress."""
+    mud = Mud(recipe)
+    for mods in mud.aggregate_modifier.modifiers.values():
+        operations = set(mod.operation for mod in mods)
+        if len(mods) > 1 and {"min", "max"} <= operations and "suppress" not in operations:
+            return None
+    effects = []
+    for code in trait_order:
+        mods = mud.mixed_modifier.modifiers[code]
+        changed = mods and mods[0].operation != "suppress" and (mods[0].operation, mods[0].scalar) != ("add", 0)
+        effects.append((mods[0].operation, mods[0].scalar) if changed else None)
+    return tuple(effects)
+
+def check_solver(seed=0, quick=False):
+    """Mixes every recipe of up to four mushrooms (three if quick) by brute
+    force, and checks that the solver finds exactly the smallest recipes of
+    randomly chosen effects, and that a recipe whose effect depends on the
+    order of the mushrooms is left out even when that trait may have any
+    effect. Returns the number of effects checked."""
+    rng = random.Random(seed)
+    mushrooms = all_mushrooms()
+    max_mushrooms = 3 if quick else 4
+    solver = RecipeSolver(mushrooms, max_mushrooms=max_mushrooms)
+    by_effect = {}
+    for size in range(1, max_mushrooms + 1):
+        for recipe in combinations_with_replacement(range(len(mushrooms)), size):
+            effect = net_effects([mushrooms[i] for i in recipe])
+            if effect is not None:
+                by_effect.setdefault(effect, []).append(recipe)
+    effects = rng.sample(list(by_effect), min(len(by_effect), 50 if quick else 500))
+    ids = {id(mushroom): i for i, mushroom in enumerate(mushrooms)}
+    for effect in effects:
+        size = min(len(recipe) for recipe in by_effect[effect])
+        expected = sorted(recipe for recipe in by_effect[effect] if len(recipe) == size)
+        cost, recipes = solver.solve(dict(zip(trait_order, effect)))
+        found = sorted(tuple(ids[id(mushroom)] for mushroom in recipe) for recipe in recipes)
+        assert cost == size and found == expected, \
+            f"solver found {found} (cost {cost}) for {effect}, expected {expected}"
+    # No mushroom of the collection has a max on a trait where another has a
+    # min, so two are made up whose mix is cheapest for a target leaving that
+    # trait unconstrained, and the solver must still leave the mix out.
+    conditions = mushrooms[0].growing_conditions[0]
+    made_up = [Mushroom("Check Min", *conditions, effects="min A, +1 E"),
+               Mushroom("Check Max", *conditions, effects="MAX A, +1 N")]
+    cost, recipes = RecipeSolver(mushrooms + made_up, max_mushrooms=2).solve("+1 E, +1 N", others="any")
+    assert cost == 2 and recipes, "no recipe found for +1 E, +1 N"
+    for recipe in recipes:
+        assert not all(mushroom in recipe for mushroom in made_up), \
+            f"solver returned the order-dependent recipe {[mushroom.name for mushroom in recipe]}"
+    return len(effects)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the recipe solver against brute force.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="check fewer and smaller recipes")
+    args = parser.parse_args()
+    print(f"{check_solver(args.seed, args.quick)} effects checked")
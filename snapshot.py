@@ -0,0 +1,190 @@
+# Compiled binary snapshot of the game catalog. Building the snapshot
+# validates every collection once and writes the data that the engines work
+# from as flat arrays: species genomes and the genome classification tables,
+# mushroom effects and growing conditions, the distinct mud effects, critter
+# spawn masks and flower data, and the per-mud arrays that the breeding
+# planner searches with (see breeding.planner_arrays). Loading maps the file
+# into memory and exposes the arrays without copying, so any number of
+# worker processes can share one read-only copy through the operating
+# system's page cache. FrogIndex, CritterIndex, MudEffectTable and
+# BreedingPlanner can each be built from a loaded snapshot with their
+# from_snapshot constructors.
+
+# Layout: the 8-byte magic string, the length of the header as a
+# little-endian uint64, a UTF-8 JSON header, and then the arrays, each
+# starting on a 64-byte boundary. The header lists every array (dtype, shape
+# and offset), the names needed to interpret ids, and the SHA-256 hash of
+# everything after the header.
+
+import hashlib
+import json
+import mmap
+import struct
+
+import numpy as np
+
+import critters_collection
+import flora_collection
+import frog_collection
+import fungi_collection
+from breeding import planner_arrays
+from critter_index import CritterIndex
+from critters import all_flavors
+from environment import all_domains, all_locations, all_habitats, all_tile_types, \
+    all_temperatures, all_humidities, all_weather
+from frog_index import FrogIndex
+from growing import condition_fields
+from mud_effects import MudEffectTable
+
+snapshot_magic = b"MUDSNAP1"
+snapshot_version = 3
+alignment = 64
+operations = ("add", "mult", "min", "max", "suppress")
+
+def condition_values():
+    """Returns the sorted vocabulary of each growing-condition field, used
+    to store conditions as small integers."""
+    return {
+        "domain": sorted(all_domains),
+        "tile_type": sorted(all_tile_types),
+        "temperature": sorted(all_temperatures),
+        "humidity": sorted(all_humidities),
+        "weather": sorted(all_weather),
+    }
+
+def catalog_arrays(max_mushrooms=3):
+    """Validates every collection and returns (names, arrays): the names of
+    everything the arrays refer to by id, and a dict of NumPy arrays."""
+    for collection in (frog_collection, fungi_collection, critters_collection, flora_collection):
+        collection.catalog.build_all()
+    frogs = list(frog_collection.catalog.values())
+    mushrooms = list(fungi_collection.catalog.values())
+    critters = list(critters_collection.catalog.values())
+    flowers = list(flora_collection.catalog.values())
+    flavors = sorted(all_flavors)
+    locations = sorted(all_locations)
+    habitats = sorted(all_habitats)
+    vocabularies = condition_values()
+
+    frog_index = FrogIndex(frogs)
+    effect_table = MudEffectTable(mushrooms, max_mushrooms=max_mushrooms)
+    critter_index = CritterIndex(critters)
+    mushroom_ids = {mushroom.name: i for i, mushroom in enumerate(mushrooms)}
+
+    modifiers = []
+    for i, mushroom in enumerate(mushrooms):
+        for t, code in enumerate("ANOURES"):
+            for mod in mushroom.modifier.modifiers[code]:
+                modifiers.append((i, t, operations.index(mod.operation), mod.scalar))
+    recipes = np.full((len(effect_table), max_mushrooms), -1, dtype=np.int16)
+    for e, effect in enumerate(effect_table):
+        recipes[e, :len(effect.recipe)] = [mushroom_ids[mushroom.name] for mushroom in effect.recipe]
+
+    arrays = {
+        "frog_codes": frog_index.frog_codes,
+        "frog_species": frog_index.frog_species,
+        "frog_flavors": np.array([sum(1 << flavors.index(flavor) for flavor in frog.flavors)
+                                  for frog in frogs], dtype=np.uint8),
+        "frog_lookup": frog_index.frog_lookup,
+        "species_lookup": frog_index.species_lookup,
+        "mushroom_modifiers": np.array(modifiers, dtype=np.int8).reshape(-1, 4),
+        "mushroom_conditions": np.array([[vocabularies[field].index(value)
+                                          for field, value in zip(condition_fields, mushroom.growing_conditions[0])]
+                                         for mushroom in mushrooms], dtype=np.uint8).reshape(-1, 5),
+        "mud_effect_tables": effect_table.tables,
+        "mud_effect_recipes": recipes,
+        "critter_masks": critter_index.masks,
+        "critter_flavors": np.array([flavors.index(critter.flavor) for critter in critters], dtype=np.uint8),
+        "flower_data": np.array([[sorted(all_domains).index(flower.domain),
+                                  sorted(all_tile_types).index(flower.tile_type),
+                                  habitats.index(flower.habitat_created) if flower.habitat_created else 255]
+                                 for flower in flowers], dtype=np.uint8).reshape(-1, 3),
+        "flower_locations": np.array([sum(1 << locations.index(location) for location in flower.locations)
+                                      for flower in flowers], dtype=np.uint16),
+    }
+    arrays.update({"breeding_" + name: array for name, array in planner_arrays(effect_table.tables[effect_table.non_identity()]).items()})
+    names = {
+        "frogs": [frog.variant or frog.species for frog in frogs],
+        "species": frog_index.species,
+        "mushrooms": [mushroom.name for mushroom in mushrooms],
+        "critters": [critter.name for critter in critters],
+        "flowers": [flower.name for flower in flowers],
+        "flavors": flavors,
+        "locations": locations,
+        "habitats": habitats,
+        "operations": list(operations),
+        "conditions": vocabularies,
+        "critter_bits": [f"{dimension}:{value}" for dimension, value in critter_index.bits],
+    }
+    return names, arrays
+
+def write_snapshot(path, max_mushrooms=3):
+    """Builds the catalog arrays and writes them to path. Returns the
+    content hash."""
+    names, arrays = catalog_arrays(max_mushrooms)
+    layout = {}
+    payload = bytearray()
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        payload += bytes(-len(payload) % alignment)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": len(payload)}
+        payload += array.tobytes()
+    content_hash = hashlib.sha256(payload).hexdigest()
+    header = json.dumps({"version": snapshot_version, "sha256": content_hash,
+                         "max_mushrooms": max_mushrooms, "names": names, "arrays": layout}).encode()
+    # Pad the header so that the payload itself starts on an aligned offset.
+    header += b" " * (-(len(snapshot_magic) + 8 + len(header)) % alignment)
+    with open(path, "wb") as f:
+        f.write(snapshot_magic)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(payload)
+    return content_hash
+
+class Snapshot:
+    """A catalog snapshot mapped read-only into memory. Arrays are available
+    by name as zero-copy NumPy views of the mapping (read-only), and names
+    holds the lists that give meaning to their ids. With verify=True the
+    content hash is checked when loading, which reads the whole file."""
+    def __init__(self, path, verify=False):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert self.mmap[:len(snapshot_magic)] == snapshot_magic, f"{path} is not a catalog snapshot"
+        start = len(snapshot_magic) + 8
+        header_length, = struct.unpack("<Q", self.mmap[len(snapshot_magic):start])
+        header = json.loads(bytes(self.mmap[start:start + header_length]))
+        assert header["version"] == snapshot_version, f"unsupported snapshot version {header['version']}"
+        self.payload_offset = start + header_length
+        self.content_hash = header["sha256"]
+        self.max_mushrooms = header["max_mushrooms"]
+        self.names = header["names"]
+        if verify:
+            digest = hashlib.sha256(memoryview(self.mmap)[self.payload_offset:]).hexdigest()
+            assert digest == self.content_hash, f"snapshot {path} is corrupt"
+        self.arrays = {}
+        for name, entry in header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"]))
+            self.arrays[name] = np.frombuffer(self.mmap, dtype=dtype, count=count,
+                                              offset=self.payload_offset + entry["offset"]).reshape(entry["shape"])
+    def __getitem__(self, name):
+        return self.arrays[name]
+    def __contains__(self, name):
+        return name in self.arrays
+    def close(self):
+        # Views into the mapping must be released before it can be closed.
+        self.arrays = {}
+        self.mmap.close()
+
+def load_snapshot(path, verify=False):
+    return Snapshot(path, verify)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build a binary snapshot of the game catalog.")
+    parser.add_argument("path", help="file to write the snapshot to")
+    parser.add_argument("--max-mushrooms", type=int, default=3,
+                        help="largest number of mushrooms per mud in the effect table")
+    args = parser.parse_args()
+    print(write_snapshot(args.path, args.max_mushrooms))
@@ -0,0 +1,163 @@
+# Hour-by-hour simulation of the game clock and weather. The time of day
+# follows the hour as described in environment.py (Dawn 5:00-7:00, Daytime
+# 7:00-19:00, Dusk 19:00-21:00, Nighttime 21:00-5:00), and the weather is a
+# sequence of hours with or without precipitation, which falls as snow in
+# Climate Control and Frozen Dreams and as rain everywhere else. What can
+# spawn or grow in a location depends only on the time of day and the
+# weather there, so there are just twelve states: everything is computed
+# once per state and location (as bit masks over the critters and the
+# mushrooms), and simulating any number of days is a single fancy-indexing
+# operation into those tables.
+
+import numpy as np
+
+from critter_index import get_critter_index, times_of_day
+from environment import all_locations, all_tile_types, waking_locations, \
+    temperate_waking_locations, temperate_dream_locations
+from growing import get_growing_index
+
+hours_per_day = 24
+weather_states = ("not raining", "raining", "snowing")
+cold_locations = all_locations - temperate_waking_locations - temperate_dream_locations
+
+def location_weather(location):
+    """Returns the kinds of weather that occur in a location: snow instead
+    of rain in the cold ones."""
+    return ("not raining", "snowing") if location in cold_locations else ("not raining", "raining")
+
+# Time of day (as an index into times_of_day) for each hour of the day.
+hour_times = np.array([3] * 5 + [0] * 2 + [1] * 12 + [2] * 2 + [3] * 3, dtype=np.int8)
+
+def mask_bits(mask, n):
+    """Returns the positions of the set bits of a mask, among the first n."""
+    return [i for i in range(n) if (int(mask) >> i) & 1]
+
+def random_weather(days, rain_chance=0.3, mean_spell=4, locations=None, seed=None):
+    """Returns a (days, 24) boolean array of precipitation, made of
+    alternating dry and wet spells of random length, with wet hours making
+    up rain_chance of the time on average and wet spells lasting mean_spell
+    hours on average. If a number of locations is given, each gets its own
+    weather, in a (days, 24, locations) array."""
+    assert 0 < rain_chance < 1 and mean_spell >= 1
+    rng = np.random.default_rng(seed)
+    hours = days * hours_per_day
+    columns = 1 if locations is None else locations
+    mean_dry = mean_spell * (1 - rain_chance) / rain_chance
+    weather = np.empty((hours, columns), dtype=bool)
+    for column in range(columns):
+        # Enough spells to cover every hour, drawn in batches until they do.
+        wet = rng.random() < rain_chance
+        spells = []
+        total = 0
+        while total < hours:
+            count = int(hours / (mean_dry + mean_spell)) + 2
+            wet_lengths = rng.geometric(1 / mean_spell, count)
+            dry_lengths = rng.geometric(1 / mean_dry, count) if mean_dry > 1 else np.ones(count, dtype=int)
+            pairs = np.stack([wet_lengths, dry_lengths] if wet else [dry_lengths, wet_lengths], axis=1).ravel()
+            spells.append(pairs)
+            total += pairs.sum()
+        lengths = np.concatenate(spells)
+        states = np.arange(len(lengths)) % 2 == (0 if wet else 1)
+        weather[:, column] = np.repeat(states, lengths)[:hours]
+    weather = weather.reshape(days, hours_per_day, columns)
+    return weather[:, :, 0] if locations is None else weather
+
+class WorldSimulator:
+    """Spawn and growth tables for every state of the world. For each time
+    of day, weather state and location (and tile type, for mushrooms),
+    critter_masks and mushroom_masks hold the bit mask of the critters of a
+    CritterIndex and the mushrooms of a GrowingIndex (the shared ones by
+    default) that can spawn or grow then."""
+    def __init__(self, critter_index=None, growing_index=None, locations=None, tile_types=None):
+        self.critter_index = critter_index or get_critter_index()
+        self.growing_index = growing_index or get_growing_index()
+        self.critters = self.critter_index.critters
+        self.mushrooms = self.growing_index.mushrooms
+        assert len(self.critters) <= 64 and len(self.mushrooms) <= 64, "too many entries for 64-bit masks"
+        self.locations = sorted(all_locations) if locations is None else list(locations)
+        self.tile_types = sorted(all_tile_types) if tile_types is None else list(tile_types)
+        self.cold = np.array([location in cold_locations for location in self.locations])
+        shape = (len(times_of_day), len(weather_states), len(self.locations))
+        queries = [self.critter_index.query_mask(location=location, time=time, weather=weather)
+                   for time in times_of_day for weather in weather_states for location in self.locations]
+        spawns = self.critter_index.matches_batch(queries)
+        weights = np.uint64(1) << np.arange(len(self.critters), dtype=np.uint64)
+        self.critter_masks = (spawns * weights).sum(axis=1, dtype=np.uint64).reshape(shape)
+        mushroom_ids = {id(mushroom): i for i, mushroom in enumerate(self.mushrooms)}
+        self.mushroom_masks = np.zeros(shape + (len(self.tile_types),), dtype=np.uint64)
+        for t, time in enumerate(times_of_day):
+            for w, weather in enumerate(weather_states):
+                for l, location in enumerate(self.locations):
+                    domain = "Waking" if location in waking_locations else "Dream"
+                    for k, tile_type in enumerate(self.tile_types):
+                        mask = 0
+                        for mushroom in self.growing_index.growable(domain, tile_type, time, weather):
+                            mask |= 1 << mushroom_ids[id(mushroom)]
+                        self.mushroom_masks[t, w, l, k] = mask
+    def weather_indices(self, precipitation):
+        """Converts a (days, 24) or (days, 24, locations) boolean array of
+        precipitation to (hours, locations) indices into weather_states."""
+        precipitation = np.asarray(precipitation, dtype=bool)
+        if precipitation.ndim == 2:
+            precipitation = precipitation[:, :, None]
+        assert precipitation.shape[1] == hours_per_day, "weather must be given for every hour of the day"
+        precipitation = precipitation.reshape(-1, precipitation.shape[2])
+        return np.where(precipitation, np.where(self.cold, 2, 1), 0).astype(np.int8)
+    def simulate(self, precipitation):
+        """Runs the clock over every hour of the given weather (see
+        weather_indices), starting at midnight of the first day."""
+        return WorldHistory(self, self.weather_indices(precipitation))
+
+class WorldHistory:
+    """The result of a simulation: for every hour and location, the time of
+    day and weather, and the masks of the critters that can spawn and (per
+    tile type) the mushrooms that can grow."""
+    def __init__(self, simulator, weather):
+        self.simulator = simulator
+        self.weather = weather
+        self.hours = len(weather)
+        self.times = np.resize(hour_times, self.hours)
+        locations = np.arange(len(simulator.locations))
+        self.critter_masks = simulator.critter_masks[self.times[:, None], weather, locations]
+        self.mushroom_masks = simulator.mushroom_masks[self.times[:, None], weather, locations]
+    def __len__(self):
+        return self.hours
+    def state_counts(self):
+        """Returns the number of hours spent in each (time of day, weather)
+        state in each location, as a (4, 3, locations) array."""
+        states = self.times[:, None].astype(np.intp) * len(weather_states) + self.weather
+        n_states = len(times_of_day) * len(weather_states)
+        counts = np.stack([np.bincount(states[:, l], minlength=n_states)
+                           for l in range(states.shape[1])], axis=1)
+        return counts.reshape(len(times_of_day), len(weather_states), -1)
+    def spawn_hours(self):
+        """Returns a (locations, critters) array of the number of hours in
+        which each critter can spawn in each location."""
+        bits = (self.simulator.critter_masks[..., None] >> np.arange(len(self.simulator.critters), dtype=np.uint64)) & 1
+        return np.einsum("twl,twlc->lc", self.state_counts(), bits.astype(np.int64))
+    def growing_hours(self):
+        """Returns a (locations, tile types, mushrooms) array of the number
+        of hours in which each mushroom can grow on each tile type."""
+        bits = (self.simulator.mushroom_masks[..., None] >> np.arange(len(self.simulator.mushrooms), dtype=np.uint64)) & 1
+        return np.einsum("twl,twlkm->lkm", self.state_counts(), bits.astype(np.int64))
+    def critters(self, hour, location):
+        l = self.simulator.locations.index(location)
+        return [self.simulator.critters[i] for i in mask_bits(self.critter_masks[hour, l], len(self.simulator.critters))]
+    def mushrooms(self, hour, location, tile_type):
+        l = self.simulator.locations.index(location)
+        k = self.simulator.tile_types.index(tile_type)
+        return [self.simulator.mushrooms[i] for i in mask_bits(self.mushroom_masks[hour, l, k], len(self.simulator.mushrooms))]
+    def report(self, hour):
+        """Returns what can spawn and grow at one hour of the simulation, as
+        a dict from each location to its time of day, weather, critters and
+        mushrooms by tile type."""
+        report = {}
+        for l, location in enumerate(self.simulator.locations):
+            report[location] = {
+                "time": times_of_day[self.times[hour]],
+                "weather": weather_states[self.weather[hour, l]],
+                "critters": [critter.name for critter in self.critters(hour, location)],
+                "mushrooms": {tile_type: [mushroom.name for mushroom in self.mushrooms(hour, location, tile_type)]
+                              for tile_type in self.simulator.tile_types},
+            }
+        return report